@@ -6,69 +6,187 @@ Uses Gemini 3.1 Pro (with Google Search grounding) to:
   2. Evening → find final scores and resolve open bets
 """
 
+import asyncio
+import hashlib
 import json
 import logging
+import os
+import random
 import re
+import sqlite3
+import threading
 import time
+from itertools import islice
 from typing import Any
-from datetime import date
+from datetime import datetime, timedelta
+from pathlib import Path
+from string import Template
+from zoneinfo import ZoneInfo
 
-from google import genai
-from google.genai import types
+import orjson
+from pydantic import BaseModel
 
 log = logging.getLogger("nba-bot.analyzer")
 
+_ET = ZoneInfo("America/New_York")
+
+_DECODER = json.JSONDecoder()
+
+
+def _iter_json_array(text: str, start: int):
+    """
+    Yield the elements of the JSON array that opens at text[start], one at a
+    time, without first locating the closing bracket. Raises JSONDecodeError
+    at the first element that cannot be decoded.
+    """
+    pos, n = start + 1, len(text)
+    while True:
+        while pos < n and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= n or text[pos] == "]":
+            return
+        item, pos = _DECODER.raw_decode(text, pos)
+        yield item
+
+
+def _json_loads(s: str):
+    return orjson.loads(s)
+
+
+def _json_dumps(obj) -> str:
+    """Compact JSON — la indentación solo gasta tokens en el prompt."""
+    return orjson.dumps(obj).decode()
+
+
+def _chunks(xs, n: int):
+    it = iter(xs)
+    return list(iter(lambda: list(islice(it, n)), []))
+
+# ── Timeout por request ───────────────────────────────────────────────────────
+# Un request lento se cancela y se reenvía: la cola de latencia de Gemini es
+# mucho más larga que la media, y reintentar suele terminar antes que esperar.
+# El plazo crece con cada intento (1×, 2×, 3×...): una llamada que de verdad
+# necesita más de REQUEST_TIMEOUT (grounding + HIGH thinking) igual termina.
+REQUEST_TIMEOUT = float(os.environ.get("GEMINI_TIMEOUT", "120"))
+
+# ── Backoff ───────────────────────────────────────────────────────────────────
+# Los 429 de Gemini traen el tiempo sugerido: header Retry-After o el cuerpo
+# "'retryDelay': '37s'". Si viene se respeta; si no, backoff exponencial.
+# Siempre con ±25% de jitter para que llamadas concurrentes no reintenten
+# todas en el mismo instante.
+_RETRY_DELAY_RE = re.compile(r"retryDelay['\"]?\s*:\s*['\"]?(\d+(?:\.\d+)?)s")
+
+
+def _retry_after(err: Exception) -> float | None:
+    headers = getattr(getattr(err, "response", None), "headers", None)
+    if headers:
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):   # ausente o en formato HTTP-date
+            pass
+    match = _RETRY_DELAY_RE.search(str(err))
+    return float(match.group(1)) if match else None
+
+
+def _retry_wait(err: Exception, attempt: int) -> float:
+    base = _retry_after(err)
+    if base is None:
+        base = 2 ** attempt * 15   # 30s, 60s, 120s
+    return base * random.uniform(0.75, 1.25)
+
+# ── Response cache en disco ───────────────────────────────────────────────────
+# Reiniciar el proceso o re-lanzar la sesión morning no vuelve a pagar una
+# llamada grounded: la respuesta cruda se reutiliza durante RESPONSE_CACHE_TTL.
+# Vive en un SQLite (una fila por clave); la fecha entra en la clave, así nunca
+# se sirve la de ayer.
+RESPONSE_CACHE_DIR = Path(os.environ.get("GEMINI_CACHE_DIR",
+                                         Path.home() / ".cache" / "nba-bot"))
+RESPONSE_CACHE_TTL = 1800    # segundos
+RESPONSE_CACHE_MAX = 86400   # filas más viejas se borran al escribir
+
+
+class PromptCache:
+    """Persistent Gemini response cache: SQLite table (key, response, ts)."""
+
+    def __init__(self, path: Path):
+        self.path  = Path(path)
+        self._db   = None
+        self._lock = threading.Lock()   # health check corre en otro thread al arrancar
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, response TEXT NOT NULL, ts REAL NOT NULL)"
+            )
+        return self._db
+
+    def get(self, key: str, ttl: float) -> str | None:
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT response FROM responses WHERE key = ? AND ts > ?",
+                (key, time.time() - ttl),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            with db:   # una transacción
+                db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, response, now))
+                db.execute("DELETE FROM responses WHERE ts < ?", (now - RESPONSE_CACHE_MAX,))
+
+# ── Evening batching ─────────────────────────────────────────────────────────
+# Prompts de RESOLUTION_BATCH_SIZE partidos: un solo prompt gigante bloquea
+# hasta resolver todo, y los prompts pequeños se envían concurrentemente
+# (asyncio) con a lo sumo RESOLUTION_CONCURRENCY en vuelo.
+RESOLUTION_BATCH_SIZE  = 3
+RESOLUTION_CONCURRENCY = 8
+
 # ── System prompt (safety + capital mgmt framing) ────────────────────────────
+# Corto a propósito: viaja como system_instruction en cada request. Las reglas
+# invariantes viven aquí y los templates solo llevan lo que cambia cada día.
 SYSTEM_PROMPT = """
-You are NBA Edge Alpha, an expert sports betting analyst AI assistant.
-Your role is to analyze NBA games and provide structured data for a disciplined
-betting simulation bot.
-
-CRITICAL RULES you must always follow:
-1. CAPITAL SAFETY FIRST: Never recommend risking more than 15% of bankroll per bet.
-   Never recommend having more than 50% of bankroll exposed simultaneously.
-2. OBJECTIVITY: Base all analysis on verifiable, current data (injury reports,
-   Vegas moneylines, recent team performance). Never guess or fabricate data.
-3. STRUCTURED OUTPUT: Always respond in valid JSON so the bot can parse your output.
-   Do not include markdown fences (```json) — return raw JSON only.
-4. CONSERVATIVE BIAS: When data is uncertain or conflicting, score N=0 (neutral).
-   It is better to miss a bet than to take a bad one.
-5. SEARCH BEFORE ANSWERING: Always use Google Search to get today's real data.
-   Do not rely on training data for injury reports or current odds.
+You are NBA Edge Alpha, an expert NBA betting analyst feeding structured data
+to a disciplined betting simulation bot.
+
+RULES:
+1. CAPITAL SAFETY: never more than 15% of bankroll per bet, 50% exposed at once.
+2. OBJECTIVITY: use verifiable, current data (injury reports, Vegas moneylines,
+   recent form). Never guess or fabricate data.
+3. CONSERVATIVE BIAS: if data is uncertain or conflicting, score N=0 (neutral).
+   Missing a bet is better than taking a bad one.
+4. SEARCH FIRST: always use Google Search for today's data — never training
+   data for injuries or odds.
+5. OUTPUT: raw JSON only. No markdown fences, no extra text.
+
+Vegas implied probability: favorite -150 → 150/250 = 60%; underdog +130 → 100/230 = 43%.
 """
 
 MORNING_PROMPT_TEMPLATE = """
-Today is {today}. Current time: {time_et} ET.
-Target date for bets: {target_date}.
-
-Your job: find ALL NBA games scheduled for {target_date} that have NOT started yet.
-
-STEP 1 — Search these queries to get the full schedule:
-  - "NBA games {target_date}"
-  - "NBA schedule {target_date}"
-  List EVERY game found, there should be between 5 and 15 games on most days.
-
-STEP 2 — For EACH game on the {target_date} schedule, search:
-  - "NBA {away} vs {home} odds {target_date}" → Vegas moneyline
-  - "NBA injury report {target_date}" → injury status for both teams
-  - "{away} {home} last 5 games" → recent form
-  - "Polymarket NBA {home} win {target_date}" → Polymarket market price
-
-STEP 3 — Apply filters:
-  - EXCLUDE games that have already started or finished (tip-off before {time_et} ET if date is today)
-  - EXCLUDE games where you cannot find ANY Vegas moneyline odds
-  - EXCLUDE games where you cannot find a Polymarket market price
-  - For poly_price: use the REAL Polymarket "Yes" price in cents (e.g. 60 means 60 cents = 60%)
-  - Do NOT substitute poly_price with vegas_prob
-
-IMPORTANT: Search ALL games on the slate, not just the featured matchup.
-Most NBA days have 8-12 games. Find them all, then filter.
-
-Return a JSON array — one entry per qualifying game:
-{{
+Today is ${today}. Current time: ${time_et} ET. Target date: ${target_date}.
+
+Find ALL NBA games on ${target_date} that have NOT started yet (most days have 8-12;
+search the whole slate, not just featured matchups).
+
+1. Schedule: search "NBA games ${target_date}" and "NBA schedule ${target_date}".
+2. For EACH game search:
+   - "NBA {away} vs {home} odds ${target_date}" → Vegas moneyline
+   - "NBA injury report ${target_date}" → injuries for both teams
+   - "{away} {home} last 5 games" → recent form
+   - "Polymarket NBA {home} win ${target_date}" → Polymarket price
+3. EXCLUDE games that already tipped off (before ${time_et} ET if the date is
+   today), and games with no Vegas moneyline or no Polymarket price.
+   poly_price is the REAL Polymarket "Yes" price in cents — never vegas_prob.
+
+Return a JSON array, one entry per qualifying game ([] if none):
+{
   "home": "Team Name",
   "away": "Team Name",
-  "game_date": "{target_date}",
+  "game_date": "${target_date}",
   "tip_off_et": "HH:MM",
   "bet_on": "Team Name (Vegas favorite)",
   "market_id": "SIMULATED",
@@ -79,24 +197,18 @@ Return a JSON array — one entry per qualifying game:
   "streak_pct": <integer 0-100>,
   "news_summary": "Key injuries or NO INJURY NEWS",
   "rationale": "1-2 sentences"
-}}
-
-Vegas implied probability:
-  Favorite -150 → 150/250 = 60%
-  Underdog +130 → 100/230 = 43%
-
-Return ONLY the raw JSON array. No markdown. If none qualify: []
+}
 """
 
 EVENING_PROMPT_TEMPLATE = """
-Today is {today}. Use Google Search to find the FINAL SCORES for these NBA games:
+Today is ${today}. Use Google Search to find the FINAL SCORES for these NBA games:
 
-{bets_json}
+${bets_json}
 
 For each bet (identified by home + away teams), return a JSON object:
-{{
+{
   "resolutions": [
-    {{
+    {
       "home": "Team Name",
       "away": "Team Name",
       "winner": "Team Name (the actual winner)",
@@ -104,151 +216,304 @@ For each bet (identified by home + away teams), return a JSON object:
       "away_score": <integer>,
       "final_score": "Home 110 - Away 105",
       "status": "FINAL"
-    }}
+    }
   ]
-}}
+}
 
 If a game has not finished yet, set "status": "POSTPONED" or "IN_PROGRESS".
-Return ONLY raw JSON. No markdown, no extra text.
 """
 
+# Compilados una vez: substitute() no re-escanea llaves como str.format y los
+# JSON de ejemplo quedan literales, sin escapes {{ }}.
+_MORNING_TPL = Template(MORNING_PROMPT_TEMPLATE)
+_EVENING_TPL = Template(EVENING_PROMPT_TEMPLATE)
+
+
+# ── Response schemas (structured output: Gemini devuelve JSON válido) ────────
+class Game(BaseModel):
+    home             : str
+    away             : str
+    game_date        : str
+    tip_off_et       : str
+    bet_on           : str
+    market_id        : str
+    poly_price       : int
+    vegas_prob       : int
+    news_score       : int
+    home_away_factor : int
+    streak_pct       : int
+    news_summary     : str
+    rationale        : str
+
+
+class Resolution(BaseModel):
+    home        : str
+    away        : str
+    winner      : str | None = None
+    home_score  : int | None = None
+    away_score  : int | None = None
+    final_score : str | None = None
+    status      : str
+
+
+class Resolutions(BaseModel):
+    resolutions : list[Resolution]
+
+
+DEFAULT_MODEL = "gemini-3-flash-preview"
+
+
 
 class GeminiAnalyzer:
-    def __init__(self, api_key: str):
-        self.client = genai.Client(api_key=api_key)
-        self.model  = "gemini-3-flash-preview"
+    def __init__(self, api_key: str, model: str = DEFAULT_MODEL,
+                 cache_dir: Path = RESPONSE_CACHE_DIR):
+        # Import diferido: google.genai arrastra pydantic/httpx/protobuf y solo
+        # hace falta cuando realmente se crea un analizador.
+        from google import genai
+        from google.genai import errors, types
+        self._types  = types
+        self._errors = errors
+        self.client  = genai.Client(api_key=api_key)
+        self.model   = model
+        self._responses = PromptCache(Path(cache_dir) / "prompt_cache.sqlite")
+        # Config inmutable: se construye una vez y se reutiliza en cada llamada
+        self._tools  = [types.Tool(googleSearch=types.GoogleSearch())]
+        self._config = types.GenerateContentConfig(
+            system_instruction=SYSTEM_PROMPT,
+            thinking_config=types.ThinkingConfig(thinking_level="HIGH"),
+            tools=self._tools,
+        )
+        self._morning_prompt_cache: tuple[tuple[str, str], Template] | None = None
+        # Un solo event loop para todas las llamadas: el cliente aio de genai
+        # mantiene conexiones ligadas al loop que las creó.
+        self._loop  = asyncio.new_event_loop()
+
+    def run(self, coro):
+        """Run a coroutine to completion on the analyzer's event loop."""
+        return self._loop.run_until_complete(coro)
+
+    def _call(self, prompt: str, max_retries: int = 4,
+              request_timeout: float = REQUEST_TIMEOUT, schema=None,
+              cache_key: str | None = None,
+              cache_ttl: float = RESPONSE_CACHE_TTL) -> str:
+        """
+        Synchronous wrapper around _acall (health check, morning session).
+        With a cache_key, a response cached less than cache_ttl seconds ago is
+        returned without calling Gemini; misses are written through.
+        """
+        key = self._response_key(cache_key) if cache_key is not None else None
+        if key is not None:
+            try:
+                cached = self._responses.get(key, cache_ttl)
+            except sqlite3.Error as e:
+                log.warning("Could not read Gemini response cache: %s", e)
+                cached = None
+            if cached is not None:
+                log.info("♻️   Gemini response cache hit (%s)", cache_key)
+                return cached
+
+        raw = self.run(self._acall(prompt, max_retries, request_timeout, schema))
 
-    def _call(self, prompt: str, max_retries: int = 4) -> str:
-        """Call Gemini with Google Search grounding, HIGH thinking, and retry on 429."""
+        if key is not None and raw:
+            try:
+                self._responses.put(key, raw)
+            except sqlite3.Error as e:
+                log.warning("Could not write Gemini response cache: %s", e)
+        return raw
+
+    def _response_key(self, cache_key: str) -> str:
+        return hashlib.sha256(f"{self.model}\n{datetime.now(tz=_ET).date()}\n{cache_key}".encode()).hexdigest()
+
+    async def _acall(self, prompt: str, max_retries: int = 4,
+                     request_timeout: float = REQUEST_TIMEOUT, schema=None) -> str:
+        """
+        Call Gemini with Google Search grounding, HIGH thinking, and retry on
+        429 / 5xx / timeout. Attempt n is cancelled after n × request_timeout
+        seconds, so a call that is merely slow still gets room to finish.
+        With a schema, Gemini is constrained to return JSON matching it.
+        """
         contents = [
-            types.Content(
+            self._types.Content(
                 role="user",
-                parts=[types.Part.from_text(text=prompt)],
+                parts=[self._types.Part.from_text(text=prompt)],
             )
         ]
-        tools  = [types.Tool(googleSearch=types.GoogleSearch())]
-        config = types.GenerateContentConfig(
-            system_instruction=SYSTEM_PROMPT,
-            thinking_config=types.ThinkingConfig(thinking_level="HIGH"),
-            tools=tools,
-        )
 
         for attempt in range(1, max_retries + 1):
+            timeout = request_timeout * attempt   # default: 120s, 240s, 360s, 480s
             try:
-                full_response = ""
-                for chunk in self.client.models.generate_content_stream(
-                    model=self.model,
-                    contents=contents,
-                    config=config,
-                ):
-                    if chunk.text:
-                        full_response += chunk.text
-                return full_response.strip()
+                config = self._config
+                if schema is not None:
+                    config = config.model_copy(update={
+                        "response_mime_type": "application/json",
+                        "response_schema"   : schema,
+                    })
+                return await asyncio.wait_for(self._generate(contents, config), timeout)
 
             except Exception as e:
-                err_str = str(e).lower()
-                is_rate_limit = "429" in str(e) or "quota" in err_str or "resource_exhausted" in err_str
-                is_server_err = "500" in str(e) or "503" in str(e) or "unavailable" in err_str
-
-                if (is_rate_limit or is_server_err) and attempt < max_retries:
-                    wait = 2 ** attempt * 15   # 30s, 60s, 120s
+                # Clasificar por tipo, no por texto: un "500" dentro del cuerpo
+                # de la respuesta no es un error de servidor.
+                is_timeout    = isinstance(e, asyncio.TimeoutError)
+                is_rate_limit = isinstance(e, self._errors.ClientError) and e.code == 429
+                is_server_err = isinstance(e, self._errors.ServerError)
+
+                if (is_timeout or is_rate_limit or is_server_err) and attempt < max_retries:
+                    # Timeout → reenviar de inmediato; 429/5xx → backoff
+                    wait = 0 if is_timeout else _retry_wait(e, attempt)
+                    if is_timeout:
+                        reason = f"timed out after {timeout:.0f}s"
+                    else:
+                        reason = "rate limited" if is_rate_limit else "server error"
                     log.warning(
                         "⏳  Gemini %s (attempt %d/%d). Retrying in %ds...",
-                        "rate limited" if is_rate_limit else "server error",
-                        attempt, max_retries, wait
+                        reason, attempt, max_retries, wait
                     )
-                    time.sleep(wait)
+                    await asyncio.sleep(wait)
                 else:
                     log.error("❌  Gemini call failed after %d attempts: %s", attempt, e)
                     raise
 
         raise RuntimeError("Gemini _call exhausted all retries")
 
+    async def _generate(self, contents, config) -> str:
+        # Sin streaming: la respuesta es JSON y solo se usa completa
+        response = await self.client.aio.models.generate_content(
+            model=self.model,
+            contents=contents,
+            config=config,
+        )
+        return (response.text or "").strip()
+
     # ── Morning ───────────────────────────────────────────────────────────────
-    def morning_analysis(self) -> str:
-        from datetime import datetime, timedelta
-        from zoneinfo import ZoneInfo
-        now_et    = datetime.now(tz=ZoneInfo("America/New_York"))
+    def _morning_prompt(self) -> tuple[str, str, str]:
+        """Returns (prompt, time_et, target_date) for the current ET time."""
+        now_et    = datetime.now(tz=_ET)
         time_str  = now_et.strftime("%H:%M")
         today     = str(now_et.date())
         tomorrow  = str((now_et + timedelta(days=1)).date())
         # Si ya es tarde (>14:00 ET), buscar juegos de mañana
         target    = tomorrow if now_et.hour >= 14 else today
-        prompt = MORNING_PROMPT_TEMPLATE.format(
-            today       = today,
-            tomorrow    = tomorrow,
-            target_date = target,
-            time_et     = time_str,
-        )
+
+        # El template se formatea una vez por (día, target); solo la hora cambia
+        key = (today, target)
+        if self._morning_prompt_cache is None or self._morning_prompt_cache[0] != key:
+            self._morning_prompt_cache = (key, Template(_MORNING_TPL.safe_substitute(
+                today       = today,
+                tomorrow    = tomorrow,
+                target_date = target,
+            )))
+        prompt = self._morning_prompt_cache[1].substitute(time_et=time_str)
+        return prompt, time_str, target
+
+    def morning_analysis(self) -> str:
+        prompt, time_str, target = self._morning_prompt()
         log.info("Calling Gemini — ET: %s | searching games for: %s", time_str, target)
-        return self._call(prompt)
+        # La clave ignora la hora ET del prompt: dentro del TTL el slate es el mismo
+        return self._call(prompt, schema=list[Game], cache_key=f"morning|{target}")
 
     def parse_games(self, raw: str) -> list[dict]:
-        """Extract and validate JSON array from Gemini response."""
-        try:
-            cleaned = re.sub(r"```(?:json)?", "", raw).strip().rstrip("`").strip()
-            start = cleaned.find("[")
-            end   = cleaned.rfind("]") + 1
-            if start == -1 or end == 0:
-                log.warning("No JSON array found in morning response.")
-                return []
-            games = json.loads(cleaned[start:end])
-            log.info("Parsed %d raw games from Gemini.", len(games))
-
-            valid = []
-            for g in games:
-                home      = g.get("home", "?")
-                away      = g.get("away", "?")
-                poly      = g.get("poly_price", 0)
-                vegas     = g.get("vegas_prob", 0)
-
-                # Rechazar si no hay precio real de Vegas
-                if vegas <= 0 or vegas >= 100:
-                    log.warning("  ⛔  %s @ %s — vegas_prob inválido (%s), descartado", away, home, vegas)
-                    continue
-
-                # Si poly_price es 0 o no existe → descartar, no hay precio real de Polymarket
-                if poly <= 0 or poly >= 100:
-                    log.warning("  ⛔  %s @ %s — sin precio real de Polymarket (poly_price=%s), descartado",
-                                away, home, poly)
-                    continue
-
-                valid.append(g)
-
-            log.info("%d games valid after filtering (removed %d without real odds).",
-                     len(valid), len(games) - len(valid))
-            return valid
+        """
+        Extract and validate the JSON array of games from a Gemini response.
+        Games are decoded one at a time, so a truncated or malformed entry only
+        loses that entry and the ones after it — not the whole slate.
+        """
+        start = raw.find("[")
+        if start == -1:
+            log.warning("No JSON array found in morning response.")
+            return []
 
+        games = []
+        try:
+            for game in _iter_json_array(raw, start):
+                games.append(game)
         except json.JSONDecodeError as e:
-            log.error("Failed to parse games JSON: %s\nRaw: %s", e, raw[:500])
-            return []
+            log.error("Failed to parse games JSON after %d game(s): %s\nRaw: %s",
+                      len(games), e, raw[:500])
+
+        log.info("Parsed %d raw games from Gemini.", len(games))
+        return self._validate_games(games)
+
+    def _validate_games(self, games: list[dict]) -> list[dict]:
+        """
+        Drop games without a real Vegas line or Polymarket price (both must be
+        strictly between 0 and 100). Rejections are logged once, as a summary.
+        """
+        valid = [g for g in games
+                 if 0 < g.get("vegas_prob", 0) < 100 and 0 < g.get("poly_price", 0) < 100]
+
+        if len(valid) < len(games):
+            kept     = {id(g) for g in valid}
+            rejected = [g for g in games if id(g) not in kept]
+            log.warning("  ⛔  %d juego(s) sin odds reales, descartados: %s", len(rejected),
+                        "; ".join(f"{g.get('away', '?')} @ {g.get('home', '?')} "
+                                  f"(vegas={g.get('vegas_prob')}, poly={g.get('poly_price')})"
+                                  for g in rejected))
+
+        log.info("%d games valid after filtering (removed %d without real odds).",
+                 len(valid), len(games) - len(valid))
+        return valid
 
     # ── Evening ───────────────────────────────────────────────────────────────
-    def evening_resolution(self, open_bets: list[dict]) -> str:
-        bets_json = json.dumps(
-            [{"home": b["home"], "away": b["away"], "bet_on": b["bet_on"]} for b in open_bets],
-            indent=2,
+    def _evening_prompt(self, open_bets: list[dict]) -> str:
+        bets_json = _json_dumps(
+            [{"home": b["home"], "away": b["away"], "bet_on": b["bet_on"]} for b in open_bets]
         )
-        prompt = EVENING_PROMPT_TEMPLATE.format(
-            today=str(date.today()),
+        return _EVENING_TPL.substitute(
+            today=str(datetime.now(tz=_ET).date()),
             bets_json=bets_json,
         )
-        log.info("Calling Gemini for evening resolution...")
-        return self._call(prompt)
 
-    def parse_results(self, raw: str) -> dict[str, Any]:
-        """Returns dict keyed by 'home|away' → outcome."""
+    async def aevening_resolution(self, open_bets: list[dict]) -> dict[tuple[str, str], Any]:
+        """
+        Resolves open bets in chunks of RESOLUTION_BATCH_SIZE, one Gemini call
+        per chunk, run concurrently. Returns the merged (home, away) → outcome
+        map; a chunk whose call fails only drops its own bets.
+        """
+        batches = _chunks(open_bets, RESOLUTION_BATCH_SIZE)
+        if not batches:
+            return {}
+
+        log.info("Calling Gemini for evening resolution (%d bet(s) in %d batch(es))...",
+                 len(open_bets), len(batches))
+        prompts = [self._evening_prompt(batch) for batch in batches]
+        raws    = await self._acall_many(prompts, return_exceptions=True, schema=Resolutions)
+
+        result_map = {}
+        for batch, raw in zip(batches, raws):
+            if isinstance(raw, Exception):
+                log.error("  ❌  Resolution call failed for %s: %s",
+                          ", ".join(f"{b['home']}|{b['away']}" for b in batch), raw)
+                continue
+            result_map.update(self.parse_results(raw))
+        return result_map
+
+    async def _acall_many(self, prompts: list[str],
+                          concurrency: int = RESOLUTION_CONCURRENCY,
+                          return_exceptions: bool = False,
+                          **kwargs) -> list[str]:
+        """Fire all prompts concurrently (at most `concurrency` in flight)."""
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one(prompt: str) -> str:
+            async with sem:
+                return await self._acall(prompt, **kwargs)
+
+        return await asyncio.gather(*map(one, prompts), return_exceptions=return_exceptions)
+
+    def parse_results(self, raw: str) -> dict[tuple[str, str], Any]:
+        """Returns dict keyed by (home, away) → outcome."""
         try:
-            cleaned = re.sub(r"```(?:json)?", "", raw).strip().rstrip("`").strip()
-            start = cleaned.find("{")
-            end   = cleaned.rfind("}") + 1
-            data  = json.loads(cleaned[start:end])
-            resolutions = data.get("resolutions", [])
-            result_map = {}
-            for r in resolutions:
-                key = f"{r['home']}|{r['away']}"
-                result_map[key] = r
-            return result_map
+            data = _json_loads(raw)
         except json.JSONDecodeError as e:
             log.error("Failed to parse results JSON: %s", e)
             return {}
+        resolutions = data.get("resolutions") if isinstance(data, dict) else None
+        if not isinstance(resolutions, list):
+            log.error("Results JSON has no resolutions list: %s", raw[:200])
+            return {}
+        return self._index_resolutions(resolutions)
+
+    def _index_resolutions(self, resolutions: list[dict]) -> dict[tuple[str, str], Any]:
+        # Entradas sin home/away no se pueden asociar a ninguna apuesta
+        return {(r["home"], r["away"]): r for r in resolutions
+                if isinstance(r, dict) and "home" in r and "away" in r}
@@ -16,46 +16,88 @@ Env vars:
   SIMULATE          → "true" (default) | "false"
   DATA_DIR          → directorio persistente, ej. /data  (default: directorio actual)
   DASHBOARD_PORT    → puerto del dashboard (default: 8080)
-  FORCE_MODE        → "morning" | "evening"  (debug override)
+  FORCE_MODE        → "morning" | "evening" | "healthcheck"  (debug override)
+  GEMINI_TIMEOUT    → segundos máximos por llamada a Gemini antes de reintentar (default: 120)
+  GEMINI_CACHE_DIR  → cache en disco de respuestas morning (default: DATA_DIR/.gemini_cache)
 """
 
+from __future__ import annotations
+
+import asyncio
+import bisect
 import os
 import json
 import logging
+import logging.handlers
+import signal
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
 from pathlib import Path
+from typing import TYPE_CHECKING
 from zoneinfo import ZoneInfo
 
-from analyzer import GeminiAnalyzer
 from portfolio import Portfolio
-from polymarket import PolymarketClient
-from nea_formula import compute_nea, compute_nea_breakdown, interpret_nea
-from dashboard_server import start_dashboard
+from nea_formula import compute_nea_batch, compute_nea_breakdown, interpret_nea_batch
+
+# analyzer (pydantic + google.genai), polymarket (requests) y dashboard_server
+# (flask) se importan dentro de main(): importar bot.py por sus helpers de
+# horario o de sesión no arrastra esos paquetes.
+if TYPE_CHECKING:
+    from analyzer import GeminiAnalyzer
+    from polymarket import PolymarketClient
 
 # ── Data directory (persistente en Railway via Volume montado en /data) ───────
 DATA_DIR = Path(os.environ.get("DATA_DIR", ".")).resolve()
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-PORTFOLIO_FILE  = str(DATA_DIR / "portfolio.json")
-FIRST_RUN_FLAG  = str(DATA_DIR / ".first_run_done")
-LOG_FILE        = str(DATA_DIR / "bot.log")
+PORTFOLIO_FILE  = DATA_DIR / "portfolio.json"
+FIRST_RUN_FLAG  = DATA_DIR / ".first_run_done"
+HEALTH_FLAG     = DATA_DIR / ".health_ok"
+STATUS_FILE     = DATA_DIR / ".bot_status"
+LOG_FILE        = DATA_DIR / "bot.log"
+GEMINI_CACHE    = Path(os.environ.get("GEMINI_CACHE_DIR", DATA_DIR / ".gemini_cache"))
 
 # ── Logging ───────────────────────────────────────────────────────────────────
+# bot.log se escribe en lotes de 64 registros (o de inmediato ante un ERROR);
+# flush_log() vacía el buffer antes de cada espera larga para que el dashboard
+# vea el estado actual. logging.shutdown() lo vacía al salir.
+LOG_FORMAT    = "%(asctime)s [%(levelname)s] %(message)s"
+_file_handler = logging.FileHandler(LOG_FILE)
+_file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+_log_buffer   = logging.handlers.MemoryHandler(
+    capacity=64, flushLevel=logging.ERROR, target=_file_handler,
+)
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
+    format=LOG_FORMAT,
     handlers=[
         logging.StreamHandler(),
-        logging.FileHandler(LOG_FILE),
+        _log_buffer,
     ],
 )
 log = logging.getLogger("nba-bot")
 
+
+def flush_log():
+    _log_buffer.flush()
+
+
+def write_status(state: str):
+    """Estado actual para el dashboard (.bot_status): una palabra, escrita atómicamente."""
+    tmp = STATUS_FILE.with_name(STATUS_FILE.name + ".tmp")
+    try:
+        tmp.write_text(state)
+        os.replace(tmp, STATUS_FILE)
+    except OSError as e:
+        log.warning("Could not write %s: %s", STATUS_FILE, e)
+
 # ── Config ────────────────────────────────────────────────────────────────────
 INITIAL_CAPITAL   = 20.00
 MAX_BET_PCT       = 0.15
 MAX_TOTAL_EXPOSED = 0.33
+MIN_BET_USD       = 0.10
 ET                = ZoneInfo("America/New_York")
 
 MORNING_HOUR_START = 9
@@ -63,8 +105,11 @@ MORNING_HOUR_END   = 11
 EVENING_HOUR_START = 21
 EVENING_HOUR_END   = 23
 
-# Max reintentos nocturnos esperando resultados (cada 1h)
-MAX_EVENING_RETRIES = 6
+# Max consultas nocturnas por apuesta esperando su resultado. Cada apuesta
+# espera por su cuenta: 1h en general, 30 min si su partido está en juego.
+MAX_EVENING_RETRIES          = 6
+EVENING_RETRY_INTERVAL       = 3600
+EVENING_IN_PROGRESS_INTERVAL = 1800
 
 
 # ── Helpers de tiempo ─────────────────────────────────────────────────────────
@@ -72,8 +117,20 @@ MAX_EVENING_RETRIES = 6
 def now_et() -> datetime:
     return datetime.now(tz=ET)
 
-def seconds_until(target_hour: int, target_minute: int = 0) -> float:
-    now = now_et()
+# Horario ET como tabla (hora_inicio, hora_fin, ventana): una bisección por
+# hora en vez de la cadena de if/elif.
+_SCHED = [
+    (0,                  MORNING_HOUR_START, "sleep_until_morning"),
+    (MORNING_HOUR_START, MORNING_HOUR_END,   "morning"),
+    (MORNING_HOUR_END,   EVENING_HOUR_START, "sleep_until_evening"),
+    (EVENING_HOUR_START, EVENING_HOUR_END,   "evening"),
+    (EVENING_HOUR_END,   24,                 "sleep_until_morning"),
+]
+_SCHED_ENDS = [row[1] for row in _SCHED]
+
+
+def seconds_until(target_hour: int, target_minute: int = 0, now: datetime | None = None) -> float:
+    now = now or now_et()
     target = now.replace(hour=target_hour, minute=target_minute, second=0, microsecond=0)
     if target <= now:
         target += timedelta(days=1)
@@ -85,50 +142,43 @@ def format_duration(seconds: float) -> str:
     s = int(seconds % 60)
     return f"{h}h {m}m {s}s"
 
-def is_in_window(start_h: int, end_h: int) -> bool:
-    h = now_et().hour
+def is_in_window(start_h: int, end_h: int, now: datetime | None = None) -> bool:
+    h = (now or now_et()).hour
     return start_h <= h < end_h
 
-def determine_current_window() -> str:
+def determine_current_window(now: datetime | None = None) -> str:
     force = os.environ.get("FORCE_MODE", "").lower()
     if force in ("morning", "evening"):
         return force
-    hour = now_et().hour
-    if MORNING_HOUR_START <= hour < MORNING_HOUR_END:
-        return "morning"
-    elif EVENING_HOUR_START <= hour < EVENING_HOUR_END:
-        return "evening"
-    elif hour < MORNING_HOUR_START:
-        return "sleep_until_morning"
-    elif MORNING_HOUR_END <= hour < EVENING_HOUR_START:
-        return "sleep_until_evening"
-    else:
-        return "sleep_until_morning"
+    hour = (now or now_et()).hour
+    return _SCHED[bisect.bisect_right(_SCHED_ENDS, hour)][2]
+
+# Un solo Event despierta al scheduler: el dashboard lo activa con el trigger
+# manual, así el sleep no necesita despertar cada 15s a revisar el flag.
+_wake = threading.Event()
+
+def _handle_sigterm(signum, frame):
+    log.info("🛑  SIGTERM received — shutting down")
+    raise SystemExit(0)
 
 def sleep_with_countdown(seconds: float, label: str, trigger_flag: Path = None):
     """Duerme hasta el próximo evento, pero se despierta si llega un trigger manual."""
     log.info("💤  Sleeping %s until %s...", format_duration(seconds), label)
-    check_interval = 15   # revisar trigger cada 15 segundos
-    log_interval   = 1800 # loguear countdown cada 30 min
-    elapsed        = 0.0
-    last_log       = 0.0
-
-    while elapsed < seconds:
-        # Detectar trigger manual — despertar inmediatamente
-        if trigger_flag and trigger_flag.exists():
-            log.info("⏰  Trigger manual detectado — saliendo del sleep")
+    write_status("SLEEPING")
+    flush_log()
+    deadline = time.monotonic() + seconds
+
+    # Un solo wait hasta el deadline: sin despertares intermedios ni líneas de
+    # countdown en bot.log. Solo se sale antes si el dashboard dispara _wake.
+    while not (trigger_flag and trigger_flag.exists()):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            log.info("⏰  Waking up for %s", label)
             return
+        if _wake.wait(remaining):
+            _wake.clear()
 
-        chunk    = min(check_interval, seconds - elapsed)
-        time.sleep(chunk)
-        elapsed += chunk
-
-        remaining = seconds - elapsed
-        if elapsed - last_log >= log_interval and remaining > 60:
-            log.info("⏳  %s remaining until %s", format_duration(remaining), label)
-            last_log = elapsed
-
-    log.info("⏰  Waking up for %s", label)
+    log.info("⏰  Trigger manual detectado — saliendo del sleep")
 
 
 # ── Morning session ───────────────────────────────────────────────────────────
@@ -136,11 +186,19 @@ def sleep_with_countdown(seconds: float, label: str, trigger_flag: Path = None):
 def run_morning(portfolio: Portfolio, analyzer: GeminiAnalyzer, poly: PolymarketClient,
                 label: str = "MORNING SESSION"):
     log.info("=" * 60)
-    log.info("  🌅  %s — %s  %s ET", label, date.today(), now_et().strftime("%H:%M"))
+    write_status("MORNING")
+    today_iso = str(date.today())   # una sola fecha para el header y todas las apuestas
+    log.info("  🌅  %s — %s  %s ET", label, today_iso, now_et().strftime("%H:%M"))
     log.info("=" * 60)
 
-    if portfolio.exposure_ratio() >= MAX_TOTAL_EXPOSED:
-        log.warning("⛔  Exposure %.0f%% ≥ 33%%. No new bets — 33% capital limit reached.", portfolio.exposure_ratio() * 100)
+    ratio     = portfolio.exposure_ratio()
+    available = portfolio.available_capital(MAX_TOTAL_EXPOSED)
+    if ratio >= MAX_TOTAL_EXPOSED:
+        log.warning("⛔  Exposure %.0f%% ≥ 33%%. No new bets — 33%% capital limit reached.", ratio * 100)
+        return 0
+    if available < MIN_BET_USD:
+        # Ni siquiera cabe la apuesta mínima: no vale la pena pagar la llamada a Gemini
+        log.info("💰  Capital cap reached ($%.2f available) — skipping session.", available)
         return 0
 
     log.info("🔍  Fetching NBA games, injuries and odds via Gemini...")
@@ -155,35 +213,39 @@ def run_morning(portfolio: Portfolio, analyzer: GeminiAnalyzer, poly: Polymarket
         return 0
 
     # ── Paso 1: evaluar todos los juegos y filtrar BUY ──────────────────────
+    # Columnas de entrada → todos los NEA en una sola pasada
+    inputs = [
+        (game.get("poly_price",       50),
+         game.get("vegas_prob",       50),
+         game.get("news_score",        0),
+         game.get("home_away_factor",  0),
+         game.get("streak_pct",       50))
+        for game in games
+    ]
+    scores  = compute_nea_batch(*zip(*inputs))
+    signals = interpret_nea_batch(scores)
+
     candidates = []   # juegos con señal BUY
-    for game in games:
+    for game, (p_poly, p_vegas, n_score, v_factor, r_pct), nea_score, nea_signal in zip(games, inputs, scores, signals):
         home = game.get("home", "?")
         away = game.get("away", "?")
         log.info("--- %s vs %s ---", home, away)
 
-        p_poly   = game.get("poly_price",       50)
-        p_vegas  = game.get("vegas_prob",        50)
-        n_score  = game.get("news_score",         0)
-        v_factor = game.get("home_away_factor",   0)
-        r_pct    = game.get("streak_pct",        50)
-
-        bd        = compute_nea_breakdown(p_poly, p_vegas, n_score, v_factor, r_pct)
-        nea_score = bd["nea"]
-        signal    = interpret_nea(nea_score)
+        bd        = compute_nea_breakdown(p_poly, p_vegas, n_score, v_factor, r_pct)   # solo para el log
 
         log.info("  📊  Datos crudos → Poly=%d¢  Vegas=%.0f%%  News=%+d  Local=%+d  Racha=%.0f%%",
                  p_poly, p_vegas, n_score, v_factor, r_pct)
         log.info("  🧮  Prob real    → Vegas:%.1f + News:%.1f + Local:%.1f + Racha:%.1f = %.1f",
                  bd["vegas_contrib"], bd["news_contrib"], bd["home_contrib"], bd["streak_contrib"], bd["real_prob"])
         log.info("  🎯  NEA = %d - %.1f = %+.2f  →  %s [%s]",
-                 p_poly, bd["real_prob"], nea_score, signal["action"], signal["confidence"])
+                 p_poly, bd["real_prob"], nea_score, nea_signal["action"], nea_signal["confidence"])
         log.info("  📰  %s", game.get("news_summary", "—"))
         log.info("  💡  %s", game.get("rationale",    "—"))
 
-        if signal["action"] != "BUY":
+        if nea_signal["action"] != "BUY":
             log.info("  ⏭   NEA=%+.2f — no alcanza umbral de -8, descartado", nea_score)
         else:
-            candidates.append({**game, "nea_score": nea_score, "signal": signal, "home": home, "away": away})
+            candidates.append({**game, "nea_score": nea_score, "signal": nea_signal, "home": home, "away": away})
             log.info("  ✅  Candidato BUY — se calculará el monto después")
 
     if not candidates:
@@ -203,7 +265,6 @@ def run_morning(portfolio: Portfolio, analyzer: GeminiAnalyzer, poly: Polymarket
     capital        = portfolio.capital
     daily_budget   = round(capital * MAX_TOTAL_EXPOSED, 4)   # 33%
     single_cap     = round(capital * MAX_BET_PCT,       4)   # 15%
-    available      = portfolio.available_capital(MAX_TOTAL_EXPOSED)
     budget         = min(daily_budget, available)            # respeta lo ya expuesto
 
     log.info("=" * 60)
@@ -220,7 +281,7 @@ def run_morning(portfolio: Portfolio, analyzer: GeminiAnalyzer, poly: Polymarket
         weight     = mag / total_magnitude          # fracción proporcional
         raw_amount = round(budget * weight, 4)      # parte del presupuesto
         amount     = round(min(raw_amount, single_cap), 2)  # tope 15%
-        amount     = max(amount, 0.10)              # mínimo operativo
+        amount     = max(amount, MIN_BET_USD)       # mínimo operativo
         sized_bets.append({**c, "amount_usd": amount, "weight_pct": round(weight * 100, 1)})
         log.info("  📐  %s → NEA=%+.2f | peso=%.1f%% | monto=$%.2f",
                  c.get("bet_on", c["home"]), c["nea_score"], weight * 100, amount)
@@ -228,19 +289,27 @@ def run_morning(portfolio: Portfolio, analyzer: GeminiAnalyzer, poly: Polymarket
     # ── Paso 3: registrar y ejecutar las apuestas ─────────────────────────────
     bets_placed = 0
     for sb in sized_bets:
-        if sb["amount_usd"] < 0.10:
-            log.warning("  ⚠   Monto muy pequeño ($%.2f) — omitido", sb["amount_usd"])
+        if available < MIN_BET_USD:
+            log.info("💰  Capital cap reached; skipping remaining candidates.")
+            break
+        # El mínimo operativo puede pasar de lo que queda bajo el 33%: recortar
+        # al disponible (truncado a centavos, nunca por encima) y omitir si ya
+        # no alcanza la apuesta mínima
+        amount = min(sb["amount_usd"], int(available * 100) / 100)
+        if amount < MIN_BET_USD:
+            log.warning("  ⚠   Solo quedan $%.2f bajo el tope — %s omitido",
+                        available, sb.get("bet_on", sb["home"]))
             continue
 
         bet = {
-            "date"        : str(date.today()),
+            "date"        : today_iso,
             "market_id"   : sb.get("market_id", "SIMULATED"),
             "home"        : sb["home"],
             "away"        : sb["away"],
             "bet_on"      : sb.get("bet_on", sb["home"]),
             "poly_price"  : sb.get("poly_price", 50),
             "nea_score"   : round(sb["nea_score"], 2),
-            "amount_usd"  : sb["amount_usd"],
+            "amount_usd"  : amount,
             "weight_pct"  : sb["weight_pct"],
             "status"      : "OPEN",
             "result"      : None,
@@ -249,15 +318,16 @@ def run_morning(portfolio: Portfolio, analyzer: GeminiAnalyzer, poly: Polymarket
             "rationale"   : sb.get("rationale",    ""),
         }
         portfolio.place_bet(bet)
+        available -= amount
         poly.place_order(
             market_id  = bet["market_id"],
             side       = "buy",
-            amount_usd = sb["amount_usd"],
+            amount_usd = amount,
             price      = bet["poly_price"] / 100.0,
         )
         bets_placed += 1
         log.info("  ✅  BET: $%.2f (%.1f%% del presupuesto) en %s @ %d¢  (NEA=%+.1f, %s)",
-                 sb["amount_usd"], sb["weight_pct"], bet["bet_on"],
+                 amount, sb["weight_pct"], bet["bet_on"],
                  bet["poly_price"], sb["nea_score"], sb["signal"]["confidence"])
 
     log.info("Session done. %d bets placed.", bets_placed)
@@ -270,6 +340,7 @@ def run_morning(portfolio: Portfolio, analyzer: GeminiAnalyzer, poly: Polymarket
 
 def run_evening(portfolio: Portfolio, analyzer: GeminiAnalyzer, poly: PolymarketClient):
     log.info("=" * 60)
+    write_status("EVENING")
     log.info("  🌙  EVENING SESSION — %s  %s ET", date.today(), now_et().strftime("%H:%M"))
     log.info("=" * 60)
 
@@ -279,61 +350,103 @@ def run_evening(portfolio: Portfolio, analyzer: GeminiAnalyzer, poly: Polymarket
         portfolio.print_summary()
         return
 
-    for attempt in range(1, MAX_EVENING_RETRIES + 1):
-        log.info("🔎  Resolution attempt %d/%d — %d bet(s) pending...",
-                 attempt, MAX_EVENING_RETRIES, len(open_bets))
+    log.info("🔎  Resolving %d open bet(s) — each polled until FINAL...", len(open_bets))
+    resolved = analyzer.run(_resolve_all(portfolio, analyzer, open_bets))
 
-        raw_results  = analyzer.evening_resolution(open_bets)
-        resolved_map = analyzer.parse_results(raw_results)
+    pending = len(open_bets) - resolved
+    if pending:
+        log.warning("⚠️   %d bet(s) unresolved after %d attempts. Will retry tomorrow evening.",
+                    pending, MAX_EVENING_RETRIES)
+    else:
+        log.info("🎉  All bets resolved!")
 
-        newly_resolved = 0
-        still_pending  = []
+    portfolio.print_summary()
+    log.info("Evening done.")
 
-        for bet in open_bets:
-            key     = f"{bet['home']}|{bet['away']}"
-            outcome = resolved_map.get(key)
 
-            if outcome and outcome.get("status") == "FINAL":
-                portfolio.resolve_bet(key, outcome["winner"], outcome.get("final_score", ""))
-                newly_resolved += 1
-            else:
-                status = outcome.get("status", "NOT_FOUND") if outcome else "NOT_FOUND"
-                log.info("  ⏳  %s — status: %s", key, status)
-                still_pending.append(bet)
+class _ResolutionBatcher:
+    """
+    Junta en una sola aevening_resolution (lotes de RESOLUTION_BATCH_SIZE) las
+    consultas de las apuestas que vencen a la vez, y registra los FINAL de
+    cada tanda con un solo resolve_batch.
+    """
 
-        portfolio.save()
+    def __init__(self, portfolio: Portfolio, analyzer: GeminiAnalyzer):
+        self.portfolio = portfolio
+        self.analyzer  = analyzer
+        self.resolved  = 0
+        self._queue: list[tuple[dict, asyncio.Future]] = []
+        self._flush_task: asyncio.Task | None = None
+
+    async def poll(self, bet: dict) -> dict | None:
+        """Outcome de la apuesta (None si Gemini no la encontró); FINAL ya queda registrado."""
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.append((bet, fut))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush())
+        return await fut
+
+    async def _flush(self):
+        await asyncio.sleep(0)   # dejar que las demás apuestas de este tick se encolen
+        batch, self._queue, self._flush_task = self._queue, [], None
+        try:
+            outcomes = await self.analyzer.aevening_resolution([bet for bet, _ in batch])
+            final    = []
+            for bet, _ in batch:
+                outcome = outcomes.get((bet["home"], bet["away"]))
+                if outcome and outcome.get("status") == "FINAL":
+                    final.append((f"{bet['home']}|{bet['away']}", outcome["winner"],
+                                  outcome.get("final_score", "")))
+            if final:
+                self.resolved += self.portfolio.resolve_batch(final)
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        for bet, fut in batch:
+            fut.set_result(outcomes.get((bet["home"], bet["away"])))
 
-        if newly_resolved > 0:
-            log.info("✅  Resolved %d bet(s) this attempt.", newly_resolved)
 
-        # Actualizar lista de pendientes
-        open_bets = still_pending
+async def _resolve_all(portfolio: Portfolio, analyzer: GeminiAnalyzer, open_bets: list[dict]) -> int:
+    """
+    Una tarea por apuesta: cada una consulta su resultado hasta FINAL y espera
+    según su propio estado, así un partido atrasado no retiene a los demás.
+    Las consultas que coinciden en el tiempo viajan juntas (_ResolutionBatcher).
+    """
+    batcher = _ResolutionBatcher(portfolio, analyzer)
+    await asyncio.gather(*(_poll_bet(batcher, bet) for bet in open_bets))
+    return batcher.resolved
 
-        if not open_bets:
-            log.info("🎉  All bets resolved!")
-            break
 
+async def _poll_bet(batcher: _ResolutionBatcher, bet: dict):
+    key = f"{bet['home']}|{bet['away']}"
+    for attempt in range(1, MAX_EVENING_RETRIES + 1):
+        try:
+            outcome = await batcher.poll(bet)
+        except Exception as e:
+            log.error("  ❌  %s — resolution failed: %s (attempt %d/%d)", key, e, attempt, MAX_EVENING_RETRIES)
+            outcome = None
+        status = outcome.get("status", "NOT_FOUND") if outcome else "NOT_FOUND"
+        if status == "FINAL":
+            return
+        log.info("  ⏳  %s — status: %s (attempt %d/%d)", key, status, attempt, MAX_EVENING_RETRIES)
         if attempt < MAX_EVENING_RETRIES:
-            log.info("⏳  %d bet(s) still pending. Retrying in 1 hour...", len(open_bets))
-            time.sleep(3600)   # esperar 1 hora
-        else:
-            log.warning("⚠️   %d bet(s) unresolved after %d attempts. Will retry tomorrow evening.",
-                        len(open_bets), MAX_EVENING_RETRIES)
-
-    portfolio.print_summary()
-    log.info("Evening done.")
+            write_status("WAITING_RESULTS")
+            flush_log()
+            await asyncio.sleep(EVENING_IN_PROGRESS_INTERVAL if status == "IN_PROGRESS"
+                                else EVENING_RETRY_INTERVAL)
 
 
 # ── Apuesta de primer arranque (fuera de horario) ─────────────────────────────
 
 def run_first_boot_bet(portfolio: Portfolio, analyzer: GeminiAnalyzer,
-                       poly: PolymarketClient, first_run_flag: str):
+                       poly: PolymarketClient, first_run_flag: Path):
     """
     Si es el primer arranque y estamos fuera de horario normal,
     hace UNA sesión de análisis y apuesta inmediatamente como prueba real del sistema.
     Solo se ejecuta una vez (controlado por .first_run_done flag).
     """
-    flag = Path(first_run_flag)
+    flag = first_run_flag
     if flag.exists():
         log.info("🚀  First-boot bet already executed — skipping.")
         return
@@ -365,22 +478,46 @@ def main():
     if not gemini_key:
         raise EnvironmentError("❌  GEMINI_API_KEY not set.")
 
+    from analyzer import GeminiAnalyzer
+    from polymarket import PolymarketClient
+    from dashboard_server import start_dashboard
+    from healthcheck import run_health_check
+
     log.info("📁  Data directory: %s", DATA_DIR)
     log.info("🎯  NEA threshold: %.1f (env NEA_THRESHOLD)", float(os.environ.get("NEA_THRESHOLD", "-6")))
 
     # Inyectar DATA_DIR al dashboard server para que lea los archivos correctos
-    os.environ["PORTFOLIO_FILE"] = PORTFOLIO_FILE
-    os.environ["LOG_FILE"]       = LOG_FILE
-
-    portfolio = Portfolio(PORTFOLIO_FILE, INITIAL_CAPITAL)
-    start_dashboard()
+    os.environ["PORTFOLIO_FILE"] = str(PORTFOLIO_FILE)
+    os.environ["LOG_FILE"]       = str(LOG_FILE)
+
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+
+    portfolio  = Portfolio(PORTFOLIO_FILE, INITIAL_CAPITAL)
+    analyzer   = GeminiAnalyzer(gemini_key, cache_dir=GEMINI_CACHE)
+    force_mode = os.environ.get("FORCE_MODE", "").lower()
+
+    # ── Arranque en paralelo: dashboard, Polymarket y health check ────────
+    # Son independientes; el health check (una llamada grounded a Gemini, un
+    # solo intento de GEMINI_TIMEOUT como máximo) domina, así que el arranque
+    # tarda lo que tarda él y no la suma.
+    need_health = force_mode == "healthcheck" or not HEALTH_FLAG.exists()
+    if need_health:
+        write_status("HEALTHCHECK")
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        f_dash   = ex.submit(start_dashboard, wake_event=_wake)
+        f_poly   = ex.submit(PolymarketClient, gamma_key)
+        f_health = ex.submit(run_health_check, analyzer, portfolio) if need_health else None
+        f_dash.result()
+        poly    = f_poly.result()
+        healthy = f_health.result() if f_health else True
     log.info("📊  Dashboard running on port %s", os.environ.get("DASHBOARD_PORT", "8080"))
 
-    analyzer = GeminiAnalyzer(gemini_key)
-    poly     = PolymarketClient(gamma_key)
+    if f_health and healthy:
+        HEALTH_FLAG.write_text(str(datetime.now()))
+    elif not healthy:
+        log.warning("⚠️   Health check failed — continuing anyway, review the output above.")
 
     # ── First boot bet (fuera de horario, solo primera vez) ───────────────
-    force_mode   = os.environ.get("FORCE_MODE", "").lower()
     window       = determine_current_window()
     is_off_hours = window in ("sleep_until_morning", "sleep_until_evening")
 
@@ -403,8 +540,9 @@ def main():
             # Después del trigger volvemos al loop normal sin dormir
             continue
 
-        window = determine_current_window()
-        log.info("📍  Window: %s  (%s ET)", window, now_et().strftime("%H:%M:%S"))
+        now    = now_et()   # un solo reloj por tick
+        window = determine_current_window(now)
+        log.info("📍  Window: %s  (%s ET)", window, now.strftime("%H:%M:%S"))
 
         if window == "morning":
             run_morning(portfolio, analyzer, poly)
@@ -415,10 +553,10 @@ def main():
             sleep_with_countdown(seconds_until(MORNING_HOUR_START), "morning session", TRIGGER_FLAG)
 
         elif window == "sleep_until_morning":
-            sleep_with_countdown(seconds_until(MORNING_HOUR_START), "morning session", TRIGGER_FLAG)
+            sleep_with_countdown(seconds_until(MORNING_HOUR_START, now=now), "morning session", TRIGGER_FLAG)
 
         elif window == "sleep_until_evening":
-            sleep_with_countdown(seconds_until(EVENING_HOUR_START), "evening session", TRIGGER_FLAG)
+            sleep_with_countdown(seconds_until(EVENING_HOUR_START, now=now), "evening session", TRIGGER_FLAG)
 
         else:
             log.warning("Unknown window: %s. Sleeping 60s.", window)
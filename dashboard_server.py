@@ -6,16 +6,20 @@ para que apunte siempre al DATA_DIR correcto.
 """
 
 import os
-import json
 import threading
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime, date
-from flask import Flask, jsonify, Response
+from flask import Flask, jsonify, request, Response
+import orjson
 
 app = Flask(__name__)
 
 PORT = int(os.environ.get("DASHBOARD_PORT", 8080))
 
+# Event del scheduler (bot.py) — el trigger manual lo despierta al instante
+_wake_event: threading.Event | None = None
+
 
 def get_portfolio_file() -> Path:
     return Path(os.environ.get("PORTFOLIO_FILE", "portfolio.json"))
@@ -24,31 +28,83 @@ def get_log_file() -> Path:
     return Path(os.environ.get("LOG_FILE", "bot.log"))
 
 
+# ── Caches por mtime ──────────────────────────────────────────────────────────
+# El browser pollea cada pocos segundos pero portfolio.json cambia un par de
+# veces al día: se parsea y se serializa solo cuando el archivo cambió.
+_cache_lock      = threading.Lock()
+_portfolio_cache = {"key": None, "data": None}
+_state_cache     = {"key": None, "body": None}
+_html_cache      = {"key": None, "body": None}
+
+
+def _stat_key(p: Path):
+    try:
+        st = p.stat()
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
 def read_portfolio() -> dict:
-    p = get_portfolio_file()
-    if p.exists():
+    p   = get_portfolio_file()
+    key = _stat_key(p)
+    with _cache_lock:
+        if key is not None and key == _portfolio_cache["key"]:
+            return _portfolio_cache["data"]
+    if key is not None:
         try:
-            return json.loads(p.read_text())
+            data = orjson.loads(p.read_bytes())
+            with _cache_lock:
+                _portfolio_cache.update(key=key, data=data)
+            return data
         except Exception:
             pass
     return {"capital": 20.0, "initial": 20.0, "total_pnl": 0.0, "bets": []}
 
 
+def _tail(path: Path, n: int, block: int = 8192) -> list[str]:
+    """Últimas n líneas leyendo bloques desde el final — no todo el archivo."""
+    with path.open("rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        buf  = b""
+        while size > 0 and buf.count(b"\n") <= n:
+            step  = min(block, size)
+            size -= step
+            f.seek(size)
+            buf   = f.read(step) + buf
+    return buf.decode("utf-8", "replace").splitlines()[-n:]
+
+
+@lru_cache(maxsize=8)
+def _tail_cached(path: str, mtime_ns: int, size: int, n: int) -> tuple[str, ...]:
+    # (mtime, size) en la clave: si el log no cambió, bot_status() y
+    # /api/log no vuelven a tocar el disco
+    return tuple(_tail(Path(path), n))
+
+
 def read_log(lines: int = 150) -> list:
     p = get_log_file()
-    if not p.exists():
+    try:
+        st = p.stat()
+    except FileNotFoundError:
         return ["Bot log not found yet — waiting for first session..."]
     try:
-        all_lines = p.read_text(errors="replace").splitlines()
-        return all_lines[-lines:]
+        return list(_tail_cached(str(p), st.st_mtime_ns, st.st_size, lines))
     except Exception as e:
         return [f"Error reading log: {e}"]
 
 
 def bot_status() -> str:
-    flag = get_portfolio_file().parent / ".health_ok"
-    if not flag.exists():
+    data_dir = get_portfolio_file().parent
+    if not (data_dir / ".health_ok").exists():
         return "STARTING"
+    # El bot escribe su estado en .bot_status en cada transición
+    try:
+        return (data_dir / ".bot_status").read_text().strip() or "IDLE"
+    except OSError:
+        pass
+    # Fallback (bot anterior sin sidecar): inferirlo de las últimas líneas del log
     lines = read_log(8)
     for line in reversed(lines):
         l = line.lower()
@@ -67,6 +123,17 @@ def bot_status() -> str:
 
 @app.route("/api/state")
 def api_state():
+    # bot_status() depende de .bot_status (o del log) y de .health_ok;
+    # todays_bets, de la fecha
+    pf        = get_portfolio_file()
+    today_str = str(date.today())
+    status    = _stat_key(pf.parent / ".bot_status")
+    key       = (_stat_key(pf), status or _stat_key(get_log_file()),
+                 (pf.parent / ".health_ok").exists(), today_str)
+    with _cache_lock:
+        if key == _state_cache["key"]:
+            return _state_response(_state_cache["body"])
+
     data    = read_portfolio()
     bets    = data.get("bets", [])
     capital = data.get("capital", 20.0)
@@ -74,41 +141,74 @@ def api_state():
     pnl     = data.get("total_pnl", 0.0)
     roi     = ((capital - initial) / initial * 100) if initial else 0
 
-    resolved = [b for b in bets if b.get("status") == "RESOLVED"]
-    open_b   = [b for b in bets if b.get("status") == "OPEN"]
-    wins     = [b for b in resolved if (b.get("pnl") or 0) > 0]
-    losses   = [b for b in resolved if (b.get("pnl") or 0) <= 0]
-    win_rate = (len(wins) / len(resolved) * 100) if resolved else 0
-
-    # PnL histórico acumulativo por fecha
-    from collections import defaultdict
-    cumulative  = 0.0
-    daily       = {}
-    for b in sorted(resolved, key=lambda x: x.get("date", "")):
-        cumulative += b.get("pnl", 0)
-        daily[b["date"]] = round(cumulative, 4)
-    pnl_history = [{"date": d, "pnl": v} for d, v in sorted(daily.items())]
-
-    today_str   = str(date.today())
-    todays_bets = [b for b in bets if b.get("date") == today_str]
-
-    return jsonify({
+    # Una sola pasada: abiertas, exposición y apuestas de hoy
+    open_count   = 0
+    exposure_sum = 0.0
+    todays_bets  = []
+    for b in bets:
+        if b.get("status") == "OPEN":
+            open_count   += 1
+            exposure_sum += b.get("amount_usd", 0)
+        if b.get("date") == today_str:
+            todays_bets.append(b)
+
+    # PnL histórico y wins/losses: Portfolio los mantiene en cada resolve_bet
+    stats       = data.get("stats")
+    pnl_history = data.get("pnl_history")
+    if stats is None or pnl_history is None:   # portfolio.json anterior
+        resolved = [b for b in bets if b.get("status") == "RESOLVED"]
+        dates    = [b.get("date", "") for b in resolved]
+        # Las apuestas se añaden en orden cronológico: solo ordenar si no lo están
+        if any(a > b for a, b in zip(dates, dates[1:])):
+            resolved.sort(key=lambda x: x.get("date", ""))
+        cumulative = 0.0
+        daily      = {}
+        for b in resolved:
+            cumulative += b.get("pnl") or 0
+            daily[b.get("date", "")] = round(cumulative, 4)
+        pnl_history = [{"date": d, "pnl": v} for d, v in daily.items()]
+        n_wins      = sum(1 for b in resolved if (b.get("pnl") or 0) > 0)
+        stats       = {"wins": n_wins, "losses": len(resolved) - n_wins}
+    wins     = stats["wins"]
+    losses   = stats["losses"]
+    win_rate = (wins / (wins + losses) * 100) if wins + losses else 0
+
+    payload = {
         "status"      : bot_status(),
-        "timestamp"   : datetime.now().isoformat(),
         "capital"     : round(capital, 4),
         "initial"     : initial,
         "total_pnl"   : round(pnl, 4),
         "roi_pct"     : round(roi, 2),
         "win_rate"    : round(win_rate, 1),
         "total_bets"  : len(bets),
-        "open_bets"   : len(open_b),
-        "wins"        : len(wins),
-        "losses"      : len(losses),
-        "exposure_pct": round((sum(b["amount_usd"] for b in open_b) / capital * 100) if capital else 0, 1),
+        "open_bets"   : open_count,
+        "wins"        : wins,
+        "losses"      : losses,
+        "exposure_pct": round((exposure_sum / capital * 100) if capital else 0, 1),
         "pnl_history" : pnl_history,
         "todays_bets" : todays_bets,
         "all_bets"    : list(reversed(bets[-50:])),
-    })
+    }
+    body = orjson.dumps(payload)
+    with _cache_lock:
+        _state_cache.update(key=key, body=body)
+    return _state_response(body)
+
+
+def _state_response(body: bytes) -> Response:
+    # El cuerpo cacheado no lleva timestamp: se antepone en cada respuesta para
+    # que refleje la hora de la petición y no la de la última serialización
+    stamp = b'{"timestamp":"' + datetime.now().isoformat().encode() + b'",'
+    return Response(stamp + body[1:], mimetype="application/json")
+
+
+@app.after_request
+def _short_cache(resp):
+    # El browser pollea cada pocos segundos: 2s de cache HTTP absorben los
+    # refrescos duplicados sin que el estado se vea viejo
+    if request.method == "GET" and resp.mimetype == "application/json":
+        resp.headers.setdefault("Cache-Control", "max-age=2")
+    return resp
 
 
 @app.route("/api/log")
@@ -124,6 +224,8 @@ def trigger_morning():
         # Escribir un flag que el scheduler loop detecta
         flag = get_portfolio_file().parent / ".trigger_morning"
         flag.write_text("1")
+        if _wake_event is not None:
+            _wake_event.set()
         return jsonify({"ok": True, "message": "Señal enviada — el bot buscará apuestas en los próximos segundos."})
     except Exception as e:
         return jsonify({"ok": False, "message": str(e)}), 500
@@ -131,22 +233,31 @@ def trigger_morning():
 
 @app.route("/")
 def index():
+    # Bytes tal cual del disco (sin decode/encode por request); se relee solo
+    # si dashboard.html cambió, así editarlo en dev no requiere reiniciar.
     html_path = Path(__file__).parent / "dashboard.html"
-    if html_path.exists():
-        return Response(html_path.read_text(), mimetype="text/html")
-    return Response("<h1>Dashboard HTML not found</h1>", mimetype="text/html")
+    key       = _stat_key(html_path)
+    if key is None:
+        return Response("<h1>Dashboard HTML not found</h1>", mimetype="text/html")
+    with _cache_lock:
+        body = _html_cache["body"] if key == _html_cache["key"] else None
+    if body is None:
+        body = html_path.read_bytes()
+        with _cache_lock:
+            _html_cache.update(key=key, body=body)
+    return Response(body, mimetype="text/html")
 
 
 def _serve():
-    try:
-        from waitress import serve as waitress_serve
-        print(f"📊  Dashboard on http://0.0.0.0:{PORT} (waitress)")
-        waitress_serve(app, host="0.0.0.0", port=PORT, threads=4)
-    except ImportError:
-        app.run(host="0.0.0.0", port=PORT, debug=False, use_reloader=False)
+    from waitress import serve as waitress_serve
+    print(f"📊  Dashboard on http://0.0.0.0:{PORT} (waitress)")
+    waitress_serve(app, host="0.0.0.0", port=PORT, threads=8,
+                   connection_limit=200, channel_timeout=30)
 
 
-def start_dashboard():
+def start_dashboard(wake_event: threading.Event | None = None):
+    global _wake_event
+    _wake_event = wake_event
     t = threading.Thread(target=_serve, daemon=True)
     t.start()
     return t
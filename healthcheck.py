@@ -8,19 +8,22 @@ Verifica:
   4. Simulación completa WIN + LOSS
 """
 
+import functools
 import logging
 import json
 import re
-import os
-import tempfile
 from datetime import date
-from nea_formula import compute_nea, interpret_nea, W_VEGAS, W_NEWS, W_HOME, W_STREAK
+
+from nea_formula import compute_nea, compute_nea_batch, interpret_nea, W_VEGAS, W_NEWS, W_HOME, W_STREAK
 
 log = logging.getLogger("nba-bot.healthcheck")
 
 MAX_BET_PCT      = 0.33
 MAX_EXPOSURE_PCT = 0.33
 
+_FENCE_RE = re.compile(r"```(?:json)?")
+_DECODER  = json.JSONDecoder()
+
 HEALTH_PROMPT = """
 Today is {today}. This is a SYSTEM HEALTH CHECK for an NBA betting bot.
 
@@ -46,24 +49,81 @@ Return this exact JSON structure:
 """
 
 
-def run_health_check(analyzer, portfolio) -> bool:
-    print("\n" + "═" * 60)
-    print("  🔍  NBA EDGE ALPHA — STARTUP HEALTH CHECK")
-    print(f"  📐  Formula: NEA = Poly - [{W_VEGAS}·Vegas + {W_NEWS}·News + {W_HOME}·Local + {W_STREAK}·Racha]")
-    print(f"  💰  Max bet / Max exposure: {int(MAX_BET_PCT*100)}% of current capital")
-    print("═" * 60)
-
-    all_ok = True
-
-    # ── Check 1: Gemini + Internet ────────────────────────────────────────
+@functools.lru_cache(maxsize=4)
+def _prompt_for(today: str) -> str:
+    return HEALTH_PROMPT.format(today=today)
+
+
+# ── Check 2: casos NEA calibrados a los pesos actuales ───────────────────────
+# interpret_nea solo devuelve BUY o NO_BET (umbral NEA_THRESHOLD).
+NEA_TEST_CASES = [
+    {
+        "label"    : "Star OUT inesperado — no apostar",
+        "p_poly"   : 75,
+        "p_vegas"  : 72,
+        "n"        : -35,
+        "v"        : 5,
+        "r"        : 60,
+        "expected" : "NO_BET",
+    },
+    {
+        "label"    : "Valor oculto — Poly subvaluado vs Vegas",
+        "p_poly"   : 40,
+        "p_vegas"  : 60,
+        "n"        : 5,
+        "v"        : 5,
+        "r"        : 80,
+        "expected" : "BUY",
+    },
+    {
+        "label"    : "Estrella rival OUT — ventaja para nuestro equipo",
+        "p_poly"   : 45,
+        "p_vegas"  : 55,
+        "n"        : 25,
+        "v"        : -5,
+        "r"        : 40,
+        "expected" : "BUY",
+    },
+    {
+        "label"    : "Mercado eficiente — sin ventaja",
+        "p_poly"   : 50,
+        "p_vegas"  : 50,
+        "n"        : 0,
+        "v"        : 0,
+        "r"        : 50,
+        "expected" : "NO_BET",
+    },
+]
+
+
+@functools.cache
+def _nea_table() -> list[tuple]:
+    """(label, nea, batch_nea, result, expected) por caso — entradas fijas, se calcula una vez."""
+    inputs = [(tc["p_poly"], tc["p_vegas"], tc["n"], tc["v"], tc["r"]) for tc in NEA_TEST_CASES]
+    # run_morning puntúa con compute_nea_batch: debe coincidir con el escalar
+    batch  = compute_nea_batch(*zip(*inputs))
+    table  = []
+    for tc, args, batch_nea in zip(NEA_TEST_CASES, inputs, batch):
+        nea = compute_nea(*args)
+        table.append((tc["label"], nea, batch_nea, interpret_nea(nea), tc["expected"]))
+    return table
+
+
+def _check_gemini(analyzer) -> bool:
+    """Check 1: Gemini + Internet (Google Search)."""
+    ok = True
     print("\n[1/4] Testing Gemini + Google Search connection...")
     try:
-        prompt  = HEALTH_PROMPT.format(today=str(date.today()))
-        raw     = analyzer._call(prompt)
-        cleaned = re.sub(r"```(?:json)?", "", raw).strip().rstrip("`").strip()
+        prompt  = _prompt_for(str(date.today()))
+        # Un solo intento: main() espera este check antes del scheduler y los
+        # reintentos con plazo creciente podrían bloquear el arranque minutos
+        raw     = analyzer._call(prompt, max_retries=1)
+        cleaned = _FENCE_RE.sub("", raw).strip().rstrip("`").strip()
         start   = cleaned.find("{")
-        end     = cleaned.rfind("}") + 1
-        data    = json.loads(cleaned[start:end])
+        if start < 0:
+            raise ValueError("no JSON object in Gemini response")
+        # Un solo parse desde la primera llave; ignora texto después del objeto
+        data, _ = _DECODER.raw_decode(cleaned, start)
 
         if data.get("internet_ok") and data.get("status") == "OK":
             print(f"  ✅  Internet OK — Gemini responded successfully")
@@ -80,74 +140,42 @@ def run_health_check(analyzer, portfolio) -> bool:
             print(f"  📈  Sample odds: {ml.get('team')} ML {ml.get('moneyline')} → {ml.get('implied_prob')}% implied")
         else:
             print("  ❌  Gemini responded but data looks incomplete")
-            all_ok = False
+            ok = False
 
     except Exception as e:
         print(f"  ❌  FAILED: {e}")
-        all_ok = False
+        ok = False
+
+    return ok
 
-    # ── Check 2: NEA Formula — casos calibrados a los pesos actuales ──────
+
+def _check_formula() -> bool:
+    """Check 2: NEA formula — casos calibrados a los pesos actuales."""
     print("\n[2/4] Testing NEA formula with current weights...")
 
-    # Calculamos el NEA esperado para cada caso para que el test sea robusto
-    # ante cambios de pesos futuros
-    test_cases = [
-        {
-            "label"    : "Star OUT inesperado — debe ser AVOID",
-            "p_poly"   : 75,
-            "p_vegas"  : 72,
-            "n"        : -35,
-            "v"        : 5,
-            "r"        : 60,
-            "expected" : "AVOID",
-        },
-        {
-            "label"    : "Valor oculto — Poly subvaluado vs Vegas",
-            "p_poly"   : 40,
-            "p_vegas"  : 60,
-            "n"        : 5,
-            "v"        : 5,
-            "r"        : 80,
-            "expected" : "BUY",
-        },
-        {
-            "label"    : "Estrella rival OUT — ventaja para nuestro equipo",
-            "p_poly"   : 45,
-            "p_vegas"  : 55,
-            "n"        : 25,
-            "v"        : -5,
-            "r"        : 40,
-            "expected" : "BUY",
-        },
-        {
-            "label"    : "Mercado eficiente — sin ventaja",
-            "p_poly"   : 50,
-            "p_vegas"  : 50,
-            "n"        : 0,
-            "v"        : 0,
-            "r"        : 50,
-            "expected" : "NEUTRAL",
-        },
-    ]
-
-    formula_ok = True
-    for tc in test_cases:
-        nea    = compute_nea(tc["p_poly"], tc["p_vegas"], tc["n"], tc["v"], tc["r"])
-        result = interpret_nea(nea)
-        passed = result["action"] == tc["expected"]
+    ok = True
+    for label, nea, batch_nea, result, expected in _nea_table():
+        if batch_nea != nea:
+            print(f"  ❌  compute_nea_batch mismatch: {batch_nea} != {nea}")
+            ok = False
+        passed = result["action"] == expected
         icon   = "✅" if passed else "❌"
-        print(f"  {icon}  {tc['label']}")
-        print(f"       NEA={nea:+.2f}  →  {result['action']} [{result['confidence']}]  (expected: {tc['expected']})")
+        print(f"  {icon}  {label}")
+        print(f"       NEA={nea:+.2f}  →  {result['action']} [{result['confidence']}]  (expected: {expected})")
         if not passed:
-            formula_ok = False
+            ok = False
 
-    if formula_ok:
+    if ok:
         print("  ✅  All NEA formula checks passed")
     else:
         print("  ⚠️   Some NEA checks failed — review formula weights in nea_formula.py")
-        all_ok = False
 
-    # ── Check 3: Capital management — 33% ────────────────────────────────
+    return ok
+
+
+def _check_capital(portfolio) -> bool:
+    """Check 3: gestión de capital con límite del 33%."""
+    ok = True
     print("\n[3/4] Testing capital management rules (33% limit)...")
 
     cap            = portfolio.capital
@@ -164,19 +192,22 @@ def run_health_check(analyzer, portfolio) -> bool:
         print("  ✅  Capital limits computed correctly")
     else:
         print("  ❌  Capital limit error")
-        all_ok = False
+        ok = False
 
-    # ── Check 4: Simulación completa WIN + LOSS ───────────────────────────
+    return ok
+
+
+def _check_sim() -> bool:
+    """Check 4: simulación completa WIN + LOSS."""
+    ok = True
     print("\n[4/4] Running full simulation dry-run...")
 
     from portfolio import Portfolio
 
-    tmp1 = tempfile.mktemp(suffix=".json")
-    tmp2 = tempfile.mktemp(suffix=".json")
-
+    # Portfolios solo en memoria: la simulación no toca disco
     try:
         # WIN scenario
-        p1 = Portfolio(tmp1, initial_capital=20.0)
+        p1 = Portfolio(":memory:", initial_capital=20.0, persist=False)
         bet = {
             "date"        : str(date.today()),
             "market_id"   : "HEALTH_SIM",
@@ -192,7 +223,7 @@ def run_health_check(analyzer, portfolio) -> bool:
             "news_summary": "",
             "rationale"   : "",
         }
-        p1.place_bet(bet)
+        p1.place_bet(dict(bet))   # copias: resolve_bet muta la apuesta
 
         assert abs(p1.deployed_capital() - 6.60) < 0.01, "Deployed capital mismatch"
 
@@ -204,8 +235,8 @@ def run_health_check(analyzer, portfolio) -> bool:
         print(f"  ✅  WIN resolution     : OK  PnL = +${win_pnl:.2f}")
 
         # LOSS scenario
-        p2 = Portfolio(tmp2, initial_capital=20.0)
-        p2.place_bet({**bet, "id": None})
+        p2 = Portfolio(":memory:", initial_capital=20.0, persist=False)
+        p2.place_bet(dict(bet))
         p2.resolve_bet("Lakers|Warriors", "Warriors", "Warriors 112 - Lakers 104")
         resolved_loss = [b for b in p2.bets if b["status"] == "RESOLVED"]
         assert len(resolved_loss) == 1 and resolved_loss[0]["pnl"] < 0
@@ -220,13 +251,20 @@ def run_health_check(analyzer, portfolio) -> bool:
 
     except Exception as e:
         print(f"  ❌  Simulation failed: {e}")
-        all_ok = False
-    finally:
-        for p in [tmp1, tmp2]:
-            try:
-                os.unlink(p)
-            except Exception:
-                pass
+        ok = False
+
+    return ok
+
+
+def run_health_check(analyzer, portfolio) -> bool:
+    print("\n" + "═" * 60)
+    print("  🔍  NBA EDGE ALPHA — STARTUP HEALTH CHECK")
+    print(f"  📐  Formula: NEA = Poly - [{W_VEGAS}·Vegas + {W_NEWS}·News + {W_HOME}·Local + {W_STREAK}·Racha]")
+    print(f"  💰  Max bet / Max exposure: {int(MAX_BET_PCT*100)}% of current capital")
+    print("═" * 60)
+
+    results = [_check_gemini(analyzer), _check_formula(), _check_capital(portfolio), _check_sim()]
+    all_ok  = all(results)
 
     # ── Summary ───────────────────────────────────────────────────────────
     print("\n" + "═" * 60)
@@ -245,17 +245,15 @@ Busca: odds actuales DraftKings/FanDuel, lesiones confirmadas, últimos 5 result
 Responde SOLO el JSON."""
 
     try:
-        respuesta_texto = ""
-        for chunk in client.models.generate_content_stream(
+        stream = client.models.generate_content_stream(
             model=GEMINI_MODEL,
             contents=[types.Content(role="user", parts=[types.Part.from_text(text=prompt)])],
             config=types.GenerateContentConfig(
                 thinking_config=types.ThinkingConfig(thinking_budget=0),
                 tools=[types.Tool(googleSearch=types.GoogleSearch())],
             ),
-        ):
-            if chunk.text:
-                respuesta_texto += chunk.text
+        )
+        respuesta_texto = "".join(filter(None, (chunk.text for chunk in stream)))
 
         respuesta_texto = re.sub(r"```json|```", "", respuesta_texto).strip()
         match = re.search(r"\{.*\}", respuesta_texto, re.DOTALL)
@@ -10,6 +10,11 @@ Umbral único de apuesta:
 
 from typing import TypedDict
 
+try:
+    import numpy as np
+except ImportError:   # numpy es opcional — el batch cae al list comprehension
+    np = None
+
 class NEAResult(TypedDict):
     nea_score  : float
     action     : str       # "BUY" | "NO_BET"
@@ -22,9 +27,12 @@ W_NEWS   = 0.40
 W_HOME   = 0.10
 W_STREAK = 0.05
 
+_NEWS_SCALE = 100.0 / 60.0   # rango de N (-40..20) → 0-100
+
 def normalize_news_score(raw_n: float) -> float:
-    clamped = max(-40.0, min(20.0, float(raw_n)))
-    return (clamped + 40) / 60 * 100
+    raw_n   = float(raw_n)
+    clamped = -40.0 if raw_n < -40.0 else (20.0 if raw_n > 20.0 else raw_n)
+    return (clamped + 40.0) * _NEWS_SCALE
 
 def normalize_streak(win_pct: float) -> float:
     return max(0.0, min(100.0, float(win_pct)))
@@ -40,6 +48,38 @@ def compute_nea(p_poly: float, p_vegas: float, n: float, v: float, r: float) ->
     )
     return round(p_poly - real_prob, 3)
 
+# Por debajo de este tamaño el overhead de armar arrays supera al loop Python
+# (run_morning puntúa ~10 juegos); backtests y barridos largos usan NumPy.
+NUMPY_BATCH_MIN = 64
+
+def compute_nea_batch(p_poly, p_vegas, n, v, r) -> list[float]:
+    """
+    compute_nea sobre columnas paralelas (un valor por juego). Mismo resultado
+    que llamar compute_nea juego a juego, sin el costo de dos llamadas de
+    normalización por juego.
+    """
+    if np is not None and len(p_poly) >= NUMPY_BATCH_MIN:
+        n_norm = (np.clip(np.asarray(n, dtype=float), -40.0, 20.0) + 40.0) * _NEWS_SCALE
+        r_norm = np.clip(np.asarray(r, dtype=float), 0.0, 100.0)
+        nea    = np.asarray(p_poly, dtype=float) - (
+            W_VEGAS  * np.asarray(p_vegas, dtype=float)
+          + W_NEWS   * n_norm
+          + W_HOME   * np.asarray(v, dtype=float)
+          + W_STREAK * r_norm
+        )
+        # Mismo orden de operaciones que el escalar; round() de Python por
+        # elemento para que el redondeo coincida bit a bit con compute_nea
+        return [round(x, 3) for x in nea.tolist()]
+    return [
+        round(pp - (
+            W_VEGAS  * pv
+          + W_NEWS   * ((max(-40.0, min(20.0, float(nn))) + 40.0) * _NEWS_SCALE)
+          + W_HOME   * vv
+          + W_STREAK * max(0.0, min(100.0, float(rr)))
+        ), 3)
+        for pp, pv, nn, vv, rr in zip(p_poly, p_vegas, n, v, r)
+    ]
+
 def compute_nea_breakdown(p_poly: float, p_vegas: float, n: float, v: float, r: float) -> dict:
     n_norm    = normalize_news_score(n)
     r_norm    = normalize_streak(r)
@@ -74,7 +114,14 @@ def interpret_nea(nea: float) -> NEAResult:
     Umbral configurable via variable de entorno NEA_THRESHOLD (default: -6).
     NEA < threshold → BUY. Todo lo demás → NO_BET.
     """
+    return _signal(nea, get_threshold())
+
+def interpret_nea_batch(neas) -> list[NEAResult]:
+    """interpret_nea para varios NEA, leyendo NEA_THRESHOLD una sola vez."""
     threshold = get_threshold()
+    return [_signal(nea, threshold) for nea in neas]
+
+def _signal(nea: float, threshold: float) -> NEAResult:
     if nea < threshold:
         action, confidence = "BUY", "HIGH"
     else:
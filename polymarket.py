@@ -8,40 +8,90 @@ Gamma API docs: https://docs.polymarket.com
 """
 
 import os
+import copy
+import time
 import logging
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional
+from urllib3.util.retry import Retry
 
 log = logging.getLogger("nba-bot.polymarket")
 
 GAMMA_BASE_URL = "https://gamma-api.polymarket.com"
 
+# TTL (segundos) de las lecturas GET: el precio se mueve en segundos, la
+# lista de mercados en minutos
+MARKETS_TTL = 60
+PRICE_TTL   = 5
+
+
+def _make_session() -> requests.Session:
+    # Pool keep-alive compartido: las conexiones TLS a Gamma se reutilizan
+    # entre llamadas y entre clientes. Retry solo reintenta métodos idempotentes
+    # (GET), nunca un POST de orden.
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections = 32,
+        pool_maxsize     = 32,
+        max_retries      = Retry(total=3, backoff_factor=0.3,
+                                 status_forcelist=(502, 503, 504)),
+    )
+    session.mount("https://", adapter)
+    return session
+
+_SESSION = _make_session()
+
 
 class PolymarketClient:
     def __init__(self, api_key: str = ""):
         self.api_key    = api_key
         self.simulate   = os.environ.get("SIMULATE", "true").lower() == "true"
-        self.session    = requests.Session()
-        if api_key:
-            self.session.headers.update({"Authorization": f"Bearer {api_key}"})
+        self.session    = _SESSION
+        # La sesión es compartida: el auth va por request, no en session.headers
+        self._headers   = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._cache: dict[tuple, tuple[float, object]] = {}   # key → (expira, valor)
 
         mode = "SIMULATION" if self.simulate else "LIVE"
         log.info("Polymarket client initialized (%s mode)", mode)
 
+    # ── Cache de lecturas ─────────────────────────────────────────────────────
+    # Se devuelven copias: la lista de mercados son dicts mutables y un caller
+    # que los edite no debe alterar lo que verá el siguiente hit
+    def _cached(self, key: tuple):
+        hit = self._cache.get(key)
+        if hit and hit[0] > time.monotonic():
+            return copy.deepcopy(hit[1])
+        return None
+
+    def _store(self, key: tuple, value, ttl: float):
+        now = time.monotonic()
+        # Purga de caducadas en cada escritura: cada market_id nuevo es una
+        # clave más y sin esto el dict crece toda la vida del proceso
+        for k in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+            del self._cache[k]
+        self._cache[key] = (now + ttl, value)
+        return copy.deepcopy(value)
+
     # ── Market data ───────────────────────────────────────────────────────────
     def get_markets(self, keyword: str = "NBA", limit: int = 20) -> list[dict]:
         """Fetch active NBA markets from Gamma."""
         if self.simulate:
             log.info("[SIM] Would fetch markets for: %s", keyword)
             return []
+        key    = ("markets", keyword, limit)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
         try:
             resp = self.session.get(
                 f"{GAMMA_BASE_URL}/markets",
                 params={"keyword": keyword, "active": True, "limit": limit},
+                headers=self._headers,
                 timeout=10,
             )
             resp.raise_for_status()
-            return resp.json().get("markets", [])
+            return self._store(key, resp.json().get("markets", []), MARKETS_TTL)
         except requests.RequestException as e:
             log.error("Failed to fetch Polymarket markets: %s", e)
             return []
@@ -51,14 +101,19 @@ class PolymarketClient:
         if self.simulate:
             log.info("[SIM] Would fetch price for market: %s", market_id)
             return None
+        key    = ("price", market_id)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
         try:
             resp = self.session.get(
                 f"{GAMMA_BASE_URL}/markets/{market_id}",
+                headers=self._headers,
                 timeout=10,
             )
             resp.raise_for_status()
             data = resp.json()
-            return float(data.get("bestBid", 0))
+            return self._store(key, float(data.get("bestBid", 0)), PRICE_TTL)
         except requests.RequestException as e:
             log.error("Failed to fetch market price %s: %s", market_id, e)
             return None
@@ -95,6 +150,7 @@ class PolymarketClient:
             resp = self.session.post(
                 f"{GAMMA_BASE_URL}/order",
                 json=payload,
+                headers=self._headers,
                 timeout=10,
             )
             resp.raise_for_status()
@@ -2,55 +2,265 @@
 Portfolio Manager
 =================
 Tracks capital, open bets, resolved bets, and PnL.
-Persists to DATA_DIR/portfolio.json (path passed in constructor).
+Persists to DATA_DIR/portfolio.json (path passed in constructor), with every
+place/resolve also appended to a portfolio.jsonl journal so changes made
+between saves survive a crash. save() writes the snapshot and clears the
+journal.
 """
 
-import json
+import bisect
 import logging
-import uuid
+import os
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import date
 from typing import Optional
 
+import orjson
+
 log = logging.getLogger("nba-bot.portfolio")
 
 
+def _bet_date(bet: dict) -> str:
+    return bet.get("date", "")
+
+
+# ── Contabilidad en enteros ───────────────────────────────────────────────────
+# Capital, PnL y capital desplegado se llevan en diezmilésimas de dólar (la
+# misma precisión de 4 decimales que portfolio.json): sumas y restas exactas,
+# un solo redondeo al calcular el profit de cada apuesta.
+UNITS_PER_USD = 10_000
+
+def _to_units(usd: float) -> int:
+    return round(usd * UNITS_PER_USD)
+
+def _from_units(units: int) -> float:
+    return units / UNITS_PER_USD
+
+
 class Portfolio:
-    def __init__(self, filepath: str, initial_capital: float = 20.0):
+    def __init__(self, filepath: str | os.PathLike, initial_capital: float = 20.0,
+                 persist: bool = True):
         self.filepath = Path(filepath)
-        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        self.persist  = persist   # False → solo en memoria (simulaciones del health check)
+        if persist:
+            self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        self.journal_path = self.filepath.with_suffix(".jsonl")
+        self._dirty     = False   # True si hay cambios sin escribir a disco
+        self._replaying = False   # True mientras se re-aplica el journal
+        self._deferred  = 0       # >0 dentro de deferred(): save() se pospone
+        self._journal_fp = None   # handle de append abierto entre saves
         self._load(initial_capital)
 
     def _load(self, initial_capital: float):
-        if self.filepath.exists():
-            with open(self.filepath) as f:
-                data = json.load(f)
+        if self.persist and self.filepath.exists():
+            data = orjson.loads(self.filepath.read_bytes())
             self.capital   = data["capital"]
             self.initial   = data["initial"]
             self.bets      = data["bets"]
-            self.total_pnl = data["total_pnl"]
+            self._next_id  = data.get("next_id", len(self.bets))
+            self.total_pnl   = data["total_pnl"]
+            self._index_open()
+            self._resolved   = sorted((b for b in self.bets if b["status"] == "RESOLVED"),
+                                      key=_bet_date)
+            self.pnl_history = data.get("pnl_history")
+            stats            = data.get("stats")
+            if self.pnl_history is None or stats is None:
+                self._rebuild_stats()   # portfolio.json anterior a estos campos
+                self._dirty = True
+            else:
+                self.wins   = stats["wins"]
+                self.losses = stats["losses"]
+            self._replay_journal()
             log.info("Portfolio loaded from %s — Capital: $%.2f | PnL: $%.2f",
                      self.filepath, self.capital, self.total_pnl)
         else:
             self.capital   = initial_capital
             self.initial   = initial_capital
             self.bets      = []
-            self.total_pnl = 0.0
+            self._next_id  = 0
+            self.total_pnl   = 0.0
+            self._index_open()
+            self._resolved   = []
+            self.pnl_history = []
+            self.wins        = 0
+            self.losses      = 0
             log.info("New portfolio created at %s — Capital: $%.2f", self.filepath, self.capital)
+            self._dirty    = True
             self.save()
 
     def save(self):
-        data = {
-            "capital"   : round(self.capital,   4),
+        """Escribe el estado solo si cambió; dentro de deferred() espera a la salida."""
+        if not self.persist or self._deferred:
+            return
+        if self._dirty:
+            self._write()
+
+    @contextmanager
+    def deferred(self):
+        """Agrupa varios cambios + save() en una sola escritura al salir del bloque."""
+        self._deferred += 1
+        try:
+            yield self
+        finally:
+            self._deferred -= 1
+            self.save()
+
+    def _write(self):
+        """tmp + os.replace → nunca queda un JSON a medias."""
+        data = self._snapshot()
+        # Compacto: sin indent se escriben menos bytes
+        payload = orjson.dumps(data)
+        tmp = self.filepath.with_name(self.filepath.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())   # el rename no debe adelantarse a los datos
+        os.replace(tmp, self.filepath)
+        # El snapshot ya contiene todo lo del journal: compactar
+        if self._journal_fp:
+            self._journal_fp.close()
+            self._journal_fp = None
+        self.journal_path.unlink(missing_ok=True)
+        self._dirty = False
+
+    def _snapshot(self) -> dict:
+        return {
+            "capital"   : self.capital,
             "initial"   : self.initial,
-            "total_pnl" : round(self.total_pnl, 4),
+            "total_pnl" : self.total_pnl,
             "bets"      : self.bets,
+            "next_id"   : self._next_id,
+            # Derivados, mantenidos en resolve_bet: el dashboard los lee tal cual
+            "pnl_history": self.pnl_history,
+            "stats"      : {"wins": self.wins, "losses": self.losses},
         }
-        with open(self.filepath, "w") as f:
-            json.dump(data, f, indent=2)
+
+    # ── Journal (append-only) ─────────────────────────────────────────────────
+    def _journal(self, record: dict):
+        """Una línea JSON por operación — O(1) por cambio, sin reescribir el snapshot."""
+        if not self.persist or self._replaying:
+            return
+        line = orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+        # Un solo open por ciclo de save: cada cambio es write + fsync
+        if self._journal_fp is None:
+            self._journal_fp = open(self.journal_path, "ab", buffering=64 * 1024)
+        self._journal_fp.write(line)
+        self._journal_fp.flush()
+        os.fsync(self._journal_fp.fileno())
+
+    def _replay_journal(self):
+        """
+        Re-aplica operaciones posteriores al último save(). Idempotente: un
+        crash entre os.replace y el unlink deja registros ya incluidos en el
+        snapshot, y esos se saltan por id.
+        """
+        if not self.journal_path.exists():
+            return
+        by_id   = {b.get("id"): b for b in self.bets}
+        applied = 0
+        self._replaying = True
+        try:
+            with open(self.journal_path, "rb") as f:
+                for raw in f:
+                    try:
+                        rec = orjson.loads(raw)
+                    except ValueError:
+                        log.warning("Skipping torn journal line in %s", self.journal_path)
+                        continue
+                    if rec["op"] == "place":
+                        self._next_id = max(self._next_id, rec.get("next_id", 0))
+                        if rec["bet"]["id"] in by_id:
+                            continue
+                        self.place_bet(rec["bet"])
+                        by_id[rec["bet"]["id"]] = rec["bet"]
+                    elif rec["op"] == "resolve":
+                        bet = by_id.get(rec["id"])
+                        if bet is None or bet["status"] != "OPEN":
+                            continue
+                        self.resolve_bet(rec["key"], rec["winner"], rec["final_score"])
+                    applied += 1
+        finally:
+            self._replaying = False
+        if applied:
+            log.info("Replayed %d journal entr%s from %s",
+                     applied, "y" if applied == 1 else "ies", self.journal_path)
+            self._dirty = True
+
+    def _index_open(self):
+        """
+        Índices de apuestas OPEN por (home, away) y por fecha — en orden de
+        colocación — más su conteo y capital desplegado, en una sola pasada.
+        """
+        self._open_by_game = {}
+        self._open_by_date = {}
+        self._open_count   = 0
+        self._deployed_u   = 0
+        for b in self.bets:
+            if b["status"] == "OPEN":
+                b.setdefault("poly_price", 50)   # apuestas antiguas sin precio
+                self._open_count += 1
+                self._deployed_u += _to_units(b["amount_usd"])
+                self._open_by_game.setdefault((b["home"], b["away"]), []).append(b)
+                self._open_by_date.setdefault(b.get("date", ""), []).append(b)
+
+    def _unindex_open(self, bet: dict):
+        same_day = self._open_by_date[bet.get("date", "")]
+        del same_day[next(i for i, b in enumerate(same_day) if b is bet)]
+        if not same_day:
+            del self._open_by_date[bet.get("date", "")]
+
+    def _rebuild_stats(self):
+        """PnL acumulado por fecha de apuesta + wins/losses, desde cero."""
+        resolved   = self._resolved
+        cumulative = 0.0
+        daily      = {}
+        for b in resolved:
+            cumulative += b.get("pnl") or 0
+            daily[b.get("date", "")] = round(cumulative, 4)
+        self.pnl_history = [{"date": d, "pnl": v} for d, v in daily.items()]
+        self.wins        = sum(1 for b in resolved if (b.get("pnl") or 0) > 0)
+        self.losses      = len(resolved) - self.wins
+
+    def _record_resolution(self, bet: dict):
+        # _resolved se mantiene ordenada por fecha: insort en vez de sorted() en cada rebuild
+        bisect.insort(self._resolved, bet, key=_bet_date)
+        history = self.pnl_history
+        day     = bet.get("date", "")
+        if history and day < history[-1]["date"]:
+            # Apuesta de un día anterior resuelta tarde: re-acumular todo
+            self._rebuild_stats()
+            return
+        if bet["pnl"] > 0:
+            self.wins   += 1
+        else:
+            self.losses += 1
+        cumulative = round((history[-1]["pnl"] if history else 0.0) + bet["pnl"], 4)
+        if history and history[-1]["date"] == day:
+            history[-1]["pnl"] = cumulative
+        else:
+            history.append({"date": day, "pnl": cumulative})
+
+    # capital / total_pnl se exponen en USD; internamente son enteros
+    @property
+    def capital(self) -> float:
+        return _from_units(self._capital_u)
+
+    @capital.setter
+    def capital(self, usd: float):
+        self._capital_u = _to_units(usd)
+
+    @property
+    def total_pnl(self) -> float:
+        return _from_units(self._pnl_u)
+
+    @total_pnl.setter
+    def total_pnl(self, usd: float):
+        self._pnl_u = _to_units(usd)
 
     def deployed_capital(self) -> float:
-        return sum(b["amount_usd"] for b in self.bets if b["status"] == "OPEN")
+        # Suma corriente de las apuestas OPEN: place_bet suma, resolve_bet resta
+        return _from_units(self._deployed_u)
 
     def free_capital(self) -> float:
         return self.capital - self.deployed_capital()
@@ -64,57 +274,83 @@ class Portfolio:
         return max(0.0, max_deployable - currently_deployed)
 
     def place_bet(self, bet: dict):
-        if "id" not in bet or not bet["id"]:
-            bet["id"] = str(uuid.uuid4())[:8]
+        if not bet.get("id"):
+            # Contador monotónico persistido: sin colisiones de UUID truncados
+            bet["id"]      = f"b{self._next_id:08d}"
+            self._next_id += 1
+        bet.setdefault("poly_price", 50)
         self.bets.append(bet)
+        self._dirty = True
+        if bet["status"] == "OPEN":
+            self._deployed_u += _to_units(bet["amount_usd"])
+            self._open_count += 1
+            self._open_by_game.setdefault((bet["home"], bet["away"]), []).append(bet)
+            self._open_by_date.setdefault(bet.get("date", ""), []).append(bet)
+        self._journal({"op": "place", "bet": bet, "next_id": self._next_id})
         log.info("Bet %s recorded: $%.2f on %s", bet["id"], bet["amount_usd"], bet["bet_on"])
 
     def open_bets_today(self) -> list[dict]:
-        today = str(date.today())
-        return [b for b in self.bets if b["status"] == "OPEN" and b.get("date") == today]
+        return list(self._open_by_date.get(str(date.today()), ()))
 
     def open_bets_all(self) -> list[dict]:
         """All open bets regardless of date (for multi-day resolution)."""
-        return [b for b in self.bets if b["status"] == "OPEN"]
+        return [b for day in self._open_by_date.values() for b in day]
 
     def resolve_bet(self, bet_key: str, winner: str, final_score: str):
         """bet_key = 'home|away'"""
         home, away = bet_key.split("|", 1)
-        for bet in self.bets:
-            if bet["status"] != "OPEN":
-                continue
-            if bet["home"] == home and bet["away"] == away:
-                bet["status"]      = "RESOLVED"
-                bet["result"]      = winner
-                bet["final_score"] = final_score
-
-                won   = (winner == bet["bet_on"])
-                price = max(0.01, bet.get("poly_price", 50) / 100.0)
-
-                if won:
-                    profit = bet["amount_usd"] * (1.0 / price - 1)
-                    bet["pnl"]      = round(profit, 4)
-                    self.capital   += profit
-                    self.total_pnl += profit
-                    log.info("✅  WIN  bet %s: +$%.2f  (PnL total: $%.2f)",
-                             bet["id"], profit, self.total_pnl)
-                else:
-                    loss = -bet["amount_usd"]
-                    bet["pnl"]      = round(loss, 4)
-                    self.capital   += loss
-                    self.total_pnl += loss
-                    log.info("❌  LOSS bet %s: -$%.2f  (PnL total: $%.2f)",
-                             bet["id"], bet["amount_usd"], self.total_pnl)
-                return
-
-        log.warning("Could not find open bet for key: %s", bet_key)
+        pending    = self._open_by_game.get((home, away))
+        if not pending:
+            log.warning("Could not find open bet for key: %s", bet_key)
+            return
+        # La más antigua primero, igual que el recorrido lineal de self.bets
+        bet = pending.pop(0)
+        if not pending:
+            del self._open_by_game[(home, away)]
+        self._unindex_open(bet)
+        self._open_count -= 1
+        self._journal({"op": "resolve", "id": bet["id"], "key": bet_key,
+                       "winner": winner, "final_score": final_score})
+
+        bet["status"]      = "RESOLVED"
+        bet["result"]      = winner
+        bet["final_score"] = final_score
+        self._dirty        = True
+        amount_u           = _to_units(bet["amount_usd"])
+        self._deployed_u  -= amount_u
+
+        won   = (winner == bet["bet_on"])
+        price = max(0.01, bet["poly_price"] / 100.0)   # default fijado al abrirse
+
+        # Pago por dólar: 1/price si gana, 0 si pierde → pnl = amount·(pago − 1)
+        payout = (1.0 / price) if won else 0.0
+        pnl_u  = round(amount_u * (payout - 1.0))
+        bet["pnl"]       = _from_units(pnl_u)
+        self._capital_u += pnl_u
+        self._pnl_u     += pnl_u
+        log.info("%s bet %s: %s$%.2f  (PnL total: $%.2f)",
+                 "✅  WIN " if won else "❌  LOSS", bet["id"], "+" if won else "-",
+                 abs(bet["pnl"]), self.total_pnl)
+        self._record_resolution(bet)
+
+    def resolve_batch(self, resolutions: list[tuple[str, str, str]]) -> int:
+        """
+        Resolve several bets — (bet_key, winner, final_score) each — and write
+        portfolio.json once at the end. Returns how many were resolved.
+        """
+        before = self.wins + self.losses
+        with self.deferred():
+            for bet_key, winner, final_score in resolutions:
+                self.resolve_bet(bet_key, winner, final_score)
+        return self.wins + self.losses - before
 
     def print_summary(self):
-        resolved  = [b for b in self.bets if b["status"] == "RESOLVED"]
-        wins      = sum(1 for b in resolved if (b.get("pnl") or 0) > 0)
-        open_count= sum(1 for b in self.bets if b["status"] == "OPEN")
-        win_rate  = (wins / len(resolved) * 100) if resolved else 0
-        roi       = ((self.capital - self.initial) / self.initial * 100) if self.initial else 0
+        # Contadores mantenidos en place_bet/resolve_bet: sin recorrer self.bets
+        wins       = self.wins
+        n_resolved = self.wins + self.losses
+        open_count = self._open_count
+        win_rate   = (wins / n_resolved * 100) if n_resolved else 0
+        roi        = ((self.capital - self.initial) / self.initial * 100) if self.initial else 0
 
         log.info("═" * 55)
         log.info("  📊  PORTFOLIO SUMMARY")
@@ -123,6 +359,6 @@ class Portfolio:
         log.info("  Total PnL        : %+.2f$", self.total_pnl)
         log.info("  ROI              : %+.1f%%", roi)
         log.info("  Total bets       : %d  (open: %d)", len(self.bets), open_count)
-        log.info("  Win rate         : %.1f%%  (%d/%d)", win_rate, wins, len(resolved))
+        log.info("  Win rate         : %.1f%%  (%d/%d)", win_rate, wins, n_resolved)
         log.info("  Exposure         : %.1f%%", self.exposure_ratio() * 100)
         log.info("═" * 55)